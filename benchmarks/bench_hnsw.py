@@ -0,0 +1,136 @@
+"""
+Recall/latency benchmark for Chroma's HNSW index.
+
+Generates clustered synthetic corpora, builds a collection per HNSW setting,
+and for each ef_search measures p50/p99 query latency, process memory and
+recall@k against exact NumPy brute-force search. Prints a Markdown table.
+
+Run from the repo root:
+    python benchmarks/bench_hnsw.py
+    python benchmarks/bench_hnsw.py --sizes 10000 100000 1000000 --dim 256 --M 16 32 --ef-search 10 50 200
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from lab_utils.resources import _use_pysqlite3
+
+_use_pysqlite3()
+import chromadb
+
+ADD_BATCH = 5000
+
+
+# ============================================
+# DATA
+# ============================================
+def synthetic_corpus(n, dim, clusters, rng):
+    """Unit vectors drawn around random cluster centres, like embeddings of related documents."""
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centres[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def exact_top_k(corpus, queries, k, block=256):
+    """Ground truth by brute-force cosine similarity, in blocks to bound memory."""
+    truth = []
+    for start in range(0, len(queries), block):
+        scores = queries[start:start + block] @ corpus.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        truth.extend(set(row) for row in top)
+    return truth
+
+
+def rss_mb():
+    """Resident set size of this process in MB (Linux), or NaN elsewhere."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return float('nan')
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+def build_collection(client, corpus, space, m, ef_construction):
+    collection = client.create_collection(
+        f'bench_{len(corpus)}_{m}_{ef_construction}',
+        configuration={'hnsw': {'space': space, 'max_neighbors': m, 'ef_construction': ef_construction}},
+    )
+    ids = [str(i) for i in range(len(corpus))]
+    started = time.perf_counter()
+    for start in range(0, len(corpus), ADD_BATCH):
+        collection.add(ids=ids[start:start + ADD_BATCH], embeddings=corpus[start:start + ADD_BATCH])
+    return collection, time.perf_counter() - started
+
+
+def measure(collection, queries, truth, k):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append(time.perf_counter() - started)
+        found = {int(doc_id) for doc_id in result['ids'][0]}
+        recalls.append(len(found & expected) / k)
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), float(np.mean(recalls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--clusters', type=int, default=100)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--space', default='cosine')
+    parser.add_argument('--M', type=int, nargs='+', default=[16, 32])
+    parser.add_argument('--ef-construction', type=int, nargs='+', default=[100])
+    parser.add_argument('--ef-search', type=int, nargs='+', default=[10, 50, 100, 200])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='Also write the table to this file')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    header = '| vectors | M | ef_construction | ef_search | build (s) | p50 (ms) | p99 (ms) | RSS (MB) | recall@k |'
+    lines = [header, '|' + '---|' * 9]
+    print('\n'.join(lines), flush=True)
+
+    for n in args.sizes:
+        corpus = synthetic_corpus(n, args.dim, args.clusters, rng)
+        queries = synthetic_corpus(args.queries, args.dim, args.clusters, rng)
+        truth = exact_top_k(corpus, queries, args.k)
+
+        for m in args.M:
+            for ef_construction in args.ef_construction:
+                path = tempfile.mkdtemp(prefix='bench_hnsw_')
+                try:
+                    client = chromadb.PersistentClient(path=path)
+                    collection, build_seconds = build_collection(client, corpus, args.space, m, ef_construction)
+                    for ef_search in args.ef_search:
+                        collection.modify(configuration={'hnsw': {'ef_search': ef_search}})
+                        p50, p99, recall = measure(collection, queries, truth, args.k)
+                        line = (f'| {n} | {m} | {ef_construction} | {ef_search} | {build_seconds:.1f} | '
+                                f'{p50:.2f} | {p99:.2f} | {rss_mb():.0f} | {recall:.3f} |')
+                        lines.append(line)
+                        print(line, flush=True)
+                finally:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Offline ingest-and-query benchmark for the Lab4 RAG path.
+
+Uses the deterministic HashingEmbedder, so it needs no network access or API
+key. Ingests the PDFs in Lab-04-Data (optionally repeated to make a bigger
+corpus) into a temporary Chroma store through the staged pipeline, then
+times embedding + vector search for a set of questions.
+
+Run from the repo root:
+    python benchmarks/bench_rag_offline.py
+    python benchmarks/bench_rag_offline.py --copies 20 --dim 1024
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from lab_utils.embedders import HashingEmbedder
+from lab_utils.pipeline import run_pipeline
+from lab_utils.resources import get_collection
+
+DATA_DIR = './Lab-04-Data/'
+
+QUESTIONS = [
+    "What is IST 418 about?",
+    "Who teaches IST 488?",
+    "Which course covers Python programming?",
+    "How is the final grade calculated in Data in Society?",
+    "Are there any courses about interacting with AI?",
+    "What are the prerequisites for Big Data Analytics?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--copies', type=int, default=1, help='Ingest every PDF this many times')
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--k', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=20, help='Times to repeat the question set')
+    args = parser.parse_args()
+
+    pdfs = sorted(f for f in os.listdir(DATA_DIR) if f.endswith('.pdf'))
+    paths = {
+        f'{copy}/{name}': os.path.join(DATA_DIR, name)
+        for copy in range(args.copies) for name in pdfs
+    }
+
+    embedder = HashingEmbedder(dim=args.dim)
+    db_path = tempfile.mkdtemp(prefix='bench_rag_')
+    try:
+        collection = get_collection(db_path, 'bench')
+        report = run_pipeline(embedder, collection, paths)
+        print(f"ingest: {report['documents']} files, {report['chunks']} chunks in {report['seconds']}s "
+              f"({report['chunks_per_second']} chunks/s, {report['write_batches']} write batches)")
+
+        embed_ms, search_ms = [], []
+        for _ in range(args.rounds):
+            for question in QUESTIONS:
+                started = time.perf_counter()
+                vector = embedder.embed_one(question)
+                embedded = time.perf_counter()
+                collection.query(query_embeddings=[vector.tolist()], n_results=args.k)
+                embed_ms.append((embedded - started) * 1000)
+                search_ms.append((time.perf_counter() - embedded) * 1000)
+
+        for label, values in (('embed', embed_ms), ('search', search_ms)):
+            print(f"{label}: p50 {np.percentile(values, 50):.2f} ms, p99 {np.percentile(values, 99):.2f} ms "
+                  f"over {len(values)} queries")
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
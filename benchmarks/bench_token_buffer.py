@@ -0,0 +1,111 @@
+"""
+Micro-benchmark for Lab3's token buffer.
+
+Compares the original trimming loop (re-tokenize everything after every pop)
+with the prefix-sum/bisect version in lab_utils.token_buffer.
+
+Run from the repo root:
+    python benchmarks/bench_token_buffer.py
+    python benchmarks/bench_token_buffer.py --sizes 1000 10000 --max-tokens 4000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tiktoken
+
+from lab_utils.token_buffer import apply_token_buffer, make_message
+
+MODEL = "gpt-4o"
+
+
+# ============================================
+# ORIGINAL IMPLEMENTATION (baseline)
+# ============================================
+def baseline_count_tokens(text, model=MODEL):
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return len(encoding.encode(text))
+
+
+def baseline_count_messages_tokens(messages, model=MODEL):
+    total = 0
+    for message in messages:
+        total += 4
+        total += baseline_count_tokens(message["content"], model)
+    total += 2
+    return total
+
+
+def baseline_apply_token_buffer(messages, max_tokens, model=MODEL, max_pops=None):
+    """Original loop. Stops after `max_pops` removals when given, for extrapolation."""
+    system_msg = messages[0]
+    working_messages = messages[1:]
+    current_tokens = baseline_count_messages_tokens(messages, model)
+    pops = 0
+    while current_tokens > max_tokens and len(working_messages) > 1:
+        if max_pops is not None and pops >= max_pops:
+            break
+        working_messages.pop(0)
+        pops += 1
+        current_tokens = baseline_count_messages_tokens([system_msg] + working_messages, model)
+    return [system_msg] + working_messages, pops
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+def build_conversation(n):
+    messages = [{"role": "system", "content": "You are a friendly teacher helping a 10-year-old."}]
+    for i in range(n):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"Message {i}: why is the sky blue on day {i}? " * 3})
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--max-tokens", type=int, default=4000)
+    parser.add_argument("--baseline-pops", type=int, default=200,
+                        help="Baseline removals timed before extrapolating to the full trim")
+    args = parser.parse_args()
+
+    print(f"{'messages':>10} {'baseline (s)':>14} {'new, cold (s)':>14} {'new, cached (s)':>16} {'speedup':>9}")
+    for n in args.sizes:
+        conversation = build_conversation(n)
+
+        # Baseline: time a bounded number of pops, then extrapolate linearly
+        # (each pop re-counts a list that shrinks by one message)
+        began = time.perf_counter()
+        _, pops = baseline_apply_token_buffer(list(conversation), args.max_tokens, max_pops=args.baseline_pops)
+        sample = time.perf_counter() - began
+        kept = len(apply_token_buffer([dict(m) for m in conversation], args.max_tokens, MODEL))
+        total_pops = len(conversation) - kept
+        baseline = sample * total_pops / pops if pops else sample
+        estimated = "*" if pops < total_pops else ""
+
+        # New: first call tokenizes each message once and caches the count
+        messages = [dict(m) for m in conversation]
+        began = time.perf_counter()
+        apply_token_buffer(messages, args.max_tokens, MODEL)
+        cold = time.perf_counter() - began
+
+        # New, steady state: counts were cached when the messages were stored
+        messages = [make_message(m["role"], m["content"], MODEL) for m in conversation]
+        began = time.perf_counter()
+        apply_token_buffer(messages, args.max_tokens, MODEL)
+        cached = time.perf_counter() - began
+
+        print(f"{n:>10} {baseline:>13.4f}{estimated:1} {cold:>14.4f} {cached:>16.6f} {baseline / cached:>8.0f}x")
+
+    print("* extrapolated from the first --baseline-pops removals")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Shared helpers used by the lab pages in pages/
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from lab_utils.resources import shared
+
+DEFAULT_DB_PATH = os.path.join('.cache', 'answers.sqlite3')
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_MAX_ENTRIES = 2000
+
+
+def history_key(messages):
+    """Hash of the conversation history sent with a question; '' when there is none."""
+    if not messages:
+        return ''
+    payload = json.dumps([[m['role'], m['content']] for m in messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SemanticAnswerCache:
+    """
+    Cache of RAG answers looked up by question similarity.
+    A cached answer is reused when the new question's embedding has cosine
+    similarity >= threshold with a cached question AND retrieval returned the
+    same set of documents AND the same conversation history was sent, for the
+    same collection content version. Without the history, a follow-up like
+    "what are its prerequisites?" would replay an answer about another course.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._rows = []  # (answer, frozenset of source ids, history key) aligned with _matrix rows
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS answers_by_history (
+                version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                sources TEXT NOT NULL,
+                history TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def _load(self, version):
+        """Load entries for `version` into memory, dropping entries from older versions."""
+        if version == self._version:
+            return
+        self._conn.execute("DELETE FROM answers_by_history WHERE version != ?", (version,))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT embedding, sources, history, answer FROM answers_by_history "
+            "WHERE version = ? ORDER BY created_at",
+            (version,),
+        ).fetchall()
+        self._rows = [(answer, frozenset(json.loads(sources)), history) for _, sources, history, answer in rows]
+        vectors = [np.frombuffer(embedding, dtype=np.float32) for embedding, _, _, _ in rows]
+        self._matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        self._version = version
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def lookup(self, embedding, source_ids, version, threshold=DEFAULT_THRESHOLD, history=''):
+        """
+        Return a cached answer for a similar question with the same sources and
+        history (a history_key), or None.
+        """
+        with self._lock:
+            self._load(version)
+            if len(self._rows):
+                scores = self._matrix @ self._unit(embedding)
+                sources = frozenset(source_ids)
+                for i in np.argsort(-scores):
+                    if scores[i] < threshold:
+                        break
+                    if self._rows[i][1] == sources and self._rows[i][2] == history:
+                        self.hits += 1
+                        return self._rows[i][0]
+            self.misses += 1
+            return None
+
+    def store(self, question, embedding, source_ids, answer, version, history=''):
+        """Cache an answer, evicting the oldest entries past max_entries."""
+        vector = self._unit(embedding)
+        with self._lock:
+            self._load(version)
+            self._conn.execute(
+                "INSERT INTO answers_by_history VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (version, question, vector.tobytes(), json.dumps(sorted(source_ids)), history,
+                 answer, time.time()),
+            )
+            self._rows.append((answer, frozenset(source_ids), history))
+            self._matrix = vector[None, :] if not self._matrix.size else np.vstack([self._matrix, vector])
+
+            overflow = len(self._rows) - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM answers_by_history WHERE rowid IN ("
+                    "SELECT rowid FROM answers_by_history ORDER BY created_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._rows = self._rows[overflow:]
+                self._matrix = self._matrix[overflow:]
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': len(self._rows),
+        }
+
+
+def get_answer_cache():
+    """Return the process-wide SemanticAnswerCache, shared by every Streamlit session."""
+    return shared('answer_cache', SemanticAnswerCache)
@@ -0,0 +1,111 @@
+"""
+Build or refresh the Lab4 Chroma index outside the Streamlit app.
+
+Runs the staged ingestion pipeline (process-pool parsing, rate-limited
+concurrent embedding, single batched writer) over only the files the
+manifest says are new or changed. Run it before starting the app so the
+first page load finds an up-to-date index:
+
+    OPENAI_API_KEY=... python -m lab_utils.build_index
+"""
+import argparse
+import json
+import os
+
+from openai import OpenAI
+
+from lab_utils.embedders import make_embedder
+from lab_utils.lexical_index import DEFAULT_INDEX_PATH, get_lexical_index
+from lab_utils.manifest import DEFAULT_MANIFEST_PATH, content_version, sync_folder
+from lab_utils.resources import DEFAULT_HNSW, get_collection
+from lab_utils.pipeline import (
+    DEFAULT_EMBED_WORKERS,
+    DEFAULT_PARSE_WORKERS,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    run_pipeline,
+)
+
+DEFAULT_DATA_DIR = './Lab-04-Data/'
+DEFAULT_DB_PATH = './ChromaDB_for_Lab'
+DEFAULT_COLLECTION = 'Lab4Collection'
+
+
+def artifact_paths(db_path, collection):
+    """
+    (manifest path, BM25 index path) for a store and collection. The app's own
+    store keeps the default paths; any other store or collection gets its own,
+    so it is never compared against the app's manifest.
+    """
+    if os.path.normpath(db_path) == os.path.normpath(DEFAULT_DB_PATH) and collection == DEFAULT_COLLECTION:
+        return DEFAULT_MANIFEST_PATH, DEFAULT_INDEX_PATH
+    return f'{db_path}.{collection}.manifest.json', f'{db_path}.{collection}.bm25.json'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--db-path', default=DEFAULT_DB_PATH)
+    parser.add_argument('--embedder', choices=['openai', 'hashing'], default='openai',
+                        help="'hashing' embeds locally with no network or API key")
+    parser.add_argument('--collection', help='Defaults to Lab4Collection, suffixed by the embedder if not openai')
+    parser.add_argument('--manifest', help='Defaults to a manifest beside the store for this collection')
+    parser.add_argument('--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS)
+    parser.add_argument('--embed-workers', type=int, default=DEFAULT_EMBED_WORKERS)
+    parser.add_argument('--requests-per-minute', type=int, default=DEFAULT_REQUESTS_PER_MINUTE)
+    parser.add_argument('--tokens-per-minute', type=int, default=DEFAULT_TOKENS_PER_MINUTE)
+    parser.add_argument('--space', choices=['cosine', 'l2', 'ip'], default=DEFAULT_HNSW['space'],
+                        help='HNSW distance (new collections only)')
+    parser.add_argument('--M', type=int, default=DEFAULT_HNSW['max_neighbors'],
+                        help='HNSW max neighbors per node (new collections only)')
+    parser.add_argument('--ef-construction', type=int, default=DEFAULT_HNSW['ef_construction'],
+                        help='HNSW build-time ef (new collections only)')
+    parser.add_argument('--ef-search', type=int, default=None,
+                        help=f"HNSW search-time ef; changes an existing collection "
+                             f"(new collections default to {DEFAULT_HNSW['ef_search']})")
+    args = parser.parse_args(argv)
+
+    client = None
+    if args.embedder == 'openai':
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if not api_key:
+            parser.error('OPENAI_API_KEY is not set')
+        client = OpenAI(api_key=api_key)
+    embedder = make_embedder(args.embedder, client)
+
+    # Vectors from different embedders can't share a collection
+    if args.collection is None:
+        args.collection = DEFAULT_COLLECTION
+        if args.embedder != 'openai':
+            args.collection = f'{DEFAULT_COLLECTION}_{embedder.model}'
+    manifest_path, lexical_path = artifact_paths(args.db_path, args.collection)
+    if args.manifest is None:
+        args.manifest = manifest_path
+
+    hnsw = {
+        'space': args.space,
+        'max_neighbors': args.M,
+        'ef_construction': args.ef_construction,
+    }
+    if args.ef_search is not None:
+        hnsw['ef_search'] = args.ef_search
+    collection = get_collection(args.db_path, args.collection, hnsw=hnsw)
+
+    def ingest(paths):
+        return run_pipeline(
+            embedder, collection, paths,
+            parse_workers=args.parse_workers,
+            embed_workers=args.embed_workers,
+            requests_per_minute=args.requests_per_minute,
+            tokens_per_minute=args.tokens_per_minute,
+        )
+
+    report = sync_folder(args.data_dir, collection, ingest, args.manifest)
+
+    # Build the BM25 index now too, so the app only has to load it
+    get_lexical_index(collection, content_version(args.manifest), lexical_path)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
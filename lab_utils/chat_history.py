@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+import uuid
+
+import streamlit as st
+
+DEFAULT_DB_PATH = os.path.join('.cache', 'chat_history.sqlite3')
+
+# Messages kept in session state (and rendered on every rerun)
+DEFAULT_WINDOW = 20
+# Archived messages revealed per "Load older messages" click
+DEFAULT_PAGE_SIZE = 20
+
+_db_lock = threading.Lock()
+_connections = {}
+
+
+def _connect(db_path):
+    """One shared SQLite connection per database file."""
+    with _db_lock:
+        if db_path not in _connections:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                )"""
+            )
+            conn.commit()
+            _connections[db_path] = conn
+        return _connections[db_path]
+
+
+class ChatArchive:
+    """Append-only log of one session's older chat turns, stored in SQLite."""
+
+    def __init__(self, session_id, db_path=DEFAULT_DB_PATH):
+        self.session_id = session_id
+        self._conn = _connect(db_path)
+        self._count = self._conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+
+    def __len__(self):
+        return self._count
+
+    def append(self, messages):
+        """Archive messages in order after any already archived."""
+        rows = [
+            (self.session_id, self._count + i, message["role"], message["content"])
+            for i, message in enumerate(messages)
+        ]
+        with _db_lock:
+            self._conn.executemany("INSERT INTO messages VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+        self._count += len(rows)
+
+    def tail(self, limit):
+        """The most recent `limit` archived messages, oldest first."""
+        start = max(0, self._count - limit)
+        with _db_lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? ORDER BY seq",
+                (self.session_id, start),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+
+def get_archive(namespace):
+    """Return this session's archive for one page, creating it on first use."""
+    if "chat_session_id" not in st.session_state:
+        st.session_state.chat_session_id = uuid.uuid4().hex
+    key = f"chat_archive_{namespace}"
+    if key not in st.session_state:
+        st.session_state[key] = ChatArchive(f"{st.session_state.chat_session_id}:{namespace}")
+    return st.session_state[key]
+
+
+def archive_overflow(messages, archive, window=DEFAULT_WINDOW):
+    """
+    Move all but the newest `window` messages out of `messages` (in place)
+    and into the archive. Returns how many messages were moved.
+    """
+    overflow = len(messages) - window
+    if overflow <= 0:
+        return 0
+    archive.append(messages[:overflow])
+    del messages[:overflow]
+    return overflow
+
+
+def render_chat_history(messages, archive, render, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Render archived pages the user asked for, then the in-session messages.
+    `render(message)` draws one message's content inside its chat bubble.
+    """
+    pages_key = f"chat_pages_{archive.session_id}"
+    pages = st.session_state.get(pages_key, 0)
+
+    shown = min(len(archive), pages * page_size)
+    if len(archive) > shown:
+        if st.button(f"Load older messages ({len(archive) - shown} hidden)"):
+            pages += 1
+            st.session_state[pages_key] = pages
+            shown = min(len(archive), pages * page_size)
+
+    for message in archive.tail(shown) if shown else []:
+        with st.chat_message(message["role"]):
+            render(message)
+    for message in messages:
+        with st.chat_message(message["role"]):
+            render(message)
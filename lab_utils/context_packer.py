@@ -0,0 +1,56 @@
+import re
+
+from lab_utils.token_buffer import apply_token_buffer, message_tokens, to_api_messages
+from lab_utils.tokens import count_tokens
+
+DEFAULT_CONTEXT_TOKENS = 3000
+DEFAULT_HISTORY_TOKENS = 1500
+
+# A candidate whose shingles are mostly already packed is treated as a duplicate
+SHINGLE_SIZE = 5
+MAX_OVERLAP = 0.5
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Set of overlapping word n-grams, used to spot overlapping chunks."""
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def pack_context(candidates, budget=DEFAULT_CONTEXT_TOKENS, model="gpt-5-mini"):
+    """
+    Fill a token budget with candidates in relevance order.
+    `candidates` are dicts with 'id' and 'text' (best first). Candidates that
+    mostly repeat text already packed are skipped, as are ones that don't fit.
+    Returns (packed candidates, tokens used).
+    """
+    packed, used = [], 0
+    seen = set()
+    for candidate in candidates:
+        candidate_shingles = shingles(candidate['text'])
+        if candidate_shingles and len(candidate_shingles & seen) / len(candidate_shingles) > MAX_OVERLAP:
+            continue
+        tokens = count_tokens(candidate['text'], model)
+        if used + tokens > budget:
+            continue
+        packed.append(candidate)
+        used += tokens
+        seen |= candidate_shingles
+    return packed, used
+
+
+def trim_history(messages, budget=DEFAULT_HISTORY_TOKENS, model="gpt-5-mini"):
+    """
+    Keep the most recent messages that fit in `budget` tokens.
+    Returns (API-ready messages, tokens used).
+    """
+    if not messages:
+        return [], 0
+    kept = apply_token_buffer(messages, budget, model)
+    used = sum(message_tokens(message, model) for message in kept)
+    # apply_token_buffer always keeps the newest message; drop it if it alone is over budget
+    if used > budget:
+        return [], 0
+    return to_api_messages(kept), used
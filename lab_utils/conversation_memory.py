@@ -0,0 +1,100 @@
+import threading
+
+from lab_utils.token_buffer import (
+    apply_token_buffer,
+    count_messages_tokens,
+    make_message,
+    to_api_messages,
+)
+from lab_utils.tokens import count_tokens
+
+DEFAULT_RECENT_TOKENS = 300
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a child and a friendly teacher.
+
+Current summary:
+{summary}
+
+New turns to fold in:
+{turns}
+
+Write the updated summary in under 150 words. Keep the topics asked about and key facts explained."""
+
+
+class RollingSummaryMemory:
+    """
+    Conversation memory that keeps recent turns verbatim and folds older
+    turns into one running summary message, so each request stays roughly
+    the same size as the conversation grows.
+    """
+
+    def __init__(self, recent_tokens=DEFAULT_RECENT_TOKENS):
+        self.recent_tokens = recent_tokens
+        self.summary = ""
+        self.summarized_count = 0  # messages (counted from the very first) folded into the summary
+        self.compactions = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def wait(self):
+        """Block until any background compaction has finished."""
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def summary_tokens(self, model="gpt-4o"):
+        return count_tokens(self.summary, model) if self.summary else 0
+
+    def build_messages(self, system_msg, history, prompt_msg, model="gpt-4o", offset=0):
+        """
+        Messages to send: system prompt, running summary, unsummarized turns, new prompt.
+        `offset` is how many earlier messages are no longer in `history` (e.g. archived).
+        Also adds the tokens this saves over sending the full history to `tokens_saved`.
+        """
+        self.wait()
+        messages = [system_msg]
+        if self.summary:
+            messages.append(make_message(
+                "system", f"Summary of the earlier conversation: {self.summary}", model))
+        messages.extend(history[max(0, self.summarized_count - offset):])
+        messages.append(prompt_msg)
+
+        full_tokens = count_messages_tokens([system_msg, *history, prompt_msg], model)
+        self.tokens_saved += max(0, full_tokens - count_messages_tokens(messages, model))
+        return messages
+
+    def compact(self, client, history, model="gpt-4o", background=True, offset=0):
+        """
+        Fold turns that no longer fit in the recent-token window into the summary.
+        Runs on a background thread between turns unless `background` is False.
+        """
+        self.wait()
+        # Absolute index of the first unsummarized message still in `history`; turns
+        # archived before summarizing started are never folded in
+        start = max(self.summarized_count, offset)
+        pending = history[start - offset:]
+        kept = apply_token_buffer(pending, self.recent_tokens, model)
+        evicted = pending[:len(pending) - len(kept)]
+        if not evicted:
+            return
+
+        turns = "\n".join(f"{m['role']}: {m['content']}" for m in to_api_messages(evicted))
+        new_count = start + len(evicted)
+        previous = self.summary or "(none yet)"
+
+        def run():
+            response = client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": SUMMARY_PROMPT.format(summary=previous, turns=turns)}],
+            )
+            with self._lock:
+                self.summary = response.choices[0].message.content
+                self.summarized_count = new_count
+                self.compactions += 1
+
+        if background:
+            self._worker = threading.Thread(target=run, daemon=True)
+            self._worker.start()
+        else:
+            run()
@@ -0,0 +1,66 @@
+import numpy as np
+
+from lab_utils.tokens import count_tokens, split_by_tokens
+
+# Defaults for retrieval over a single uploaded document
+DEFAULT_CHUNK_TOKENS = 400
+DEFAULT_OVERLAP_TOKENS = 50
+DEFAULT_TOP_K = 5
+DEFAULT_CONTEXT_TOKENS = 2000
+
+
+def _normalize(matrix):
+    """Scale rows to unit length so a dot product is cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class DocumentIndex:
+    """
+    In-memory chunk index for one document.
+    Chunk embeddings live in a single float32 NumPy matrix; search is
+    one matrix-vector product followed by a top-k selection.
+    """
+
+    def __init__(self, chunks, embeddings, model="gpt-5-nano"):
+        self.chunks = chunks
+        self.embeddings = _normalize(np.asarray(embeddings, dtype=np.float32))
+        self.chunk_tokens = [count_tokens(chunk, model) for chunk in chunks]
+
+    @classmethod
+    def build(cls, embedder, text, chunk_tokens=DEFAULT_CHUNK_TOKENS,
+              overlap_tokens=DEFAULT_OVERLAP_TOKENS, model="gpt-5-nano"):
+        """Chunk a document and embed every chunk in as few requests as possible."""
+        chunks = split_by_tokens(text, chunk_tokens, model, overlap_tokens)
+        embeddings = embedder.embed(chunks) if chunks else np.zeros((0, embedder.dim or 1))
+        return cls(chunks, embeddings, model)
+
+    def search(self, query_embedding, k=DEFAULT_TOP_K):
+        """Return the indices and scores of the k most similar chunks, best first."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = self.embeddings @ query
+        k = min(k, len(scores))
+        if k == 0:
+            return [], []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top.tolist(), scores[top].tolist()
+
+    def context_for(self, embedder, question, k=DEFAULT_TOP_K, token_budget=DEFAULT_CONTEXT_TOKENS):
+        """
+        Embed a question and return the best chunks that fit in `token_budget`,
+        in document order, plus the number of tokens used.
+        """
+        if not self.chunks:
+            return [], 0
+        indices, _ = self.search(embedder.embed_one(question), k)
+
+        selected, used = [], 0
+        for i in indices:
+            if used + self.chunk_tokens[i] > token_budget:
+                continue
+            selected.append(i)
+            used += self.chunk_tokens[i]
+        return [self.chunks[i] for i in sorted(selected)], used
@@ -0,0 +1,95 @@
+import zlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from lab_utils.ingest import EMBEDDING_MODEL, batch_by_limits
+
+
+class Embedder(ABC):
+    """
+    Interface for turning text into vectors.
+    Implementations set `model` (used in cache keys and collection names) and
+    `dim`, and return float32 arrays of shape (len(texts), dim) from embed().
+    """
+
+    model = None
+    dim = None
+
+    def __init__(self):
+        self.requests = 0  # remote calls made so far (0 for local embedders)
+
+    @abstractmethod
+    def embed(self, texts):
+        """Return a float32 array of shape (len(texts), dim)."""
+
+    def embed_one(self, text):
+        return self.embed([text])[0]
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings, sent in batches that fill the per-request limits."""
+
+    DIMENSIONS = {'text-embedding-3-small': 1536, 'text-embedding-3-large': 3072}
+
+    def __init__(self, client, model=EMBEDDING_MODEL):
+        super().__init__()
+        self.client = client
+        self.model = model
+        self.dim = self.DIMENSIONS.get(model)
+
+    def embed(self, texts):
+        vectors = []
+        for batch in batch_by_limits(texts, self.model):
+            response = self.client.embeddings.create(input=batch, model=self.model)
+            vectors.extend(item.embedding for item in response.data)
+            self.requests += 1
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic offline embedder: hashes word and character n-grams into a
+    fixed-size signed count vector, then L2-normalizes. No network, no model
+    weights, and fast enough to load-test ingestion and retrieval.
+    """
+
+    def __init__(self, dim=512, char_ngrams=(3, 4, 5)):
+        super().__init__()
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+        self.model = f'hashing-{dim}'
+
+    def _features(self, text):
+        text = text.lower()
+        features = text.split()
+        padded = f' {text} '
+        for n in self.char_ngrams:
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def embed(self, texts):
+        rows, columns, signs = [], [], []
+        for row, text in enumerate(texts):
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode()) for feature in self._features(text)), dtype=np.uint32
+            )
+            rows.append(np.full(len(hashes), row, dtype=np.int64))
+            columns.append((hashes % self.dim).astype(np.int64))
+            signs.append(np.where((hashes >> 31) & 1, -1.0, 1.0).astype(np.float32))
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.concatenate(rows), np.concatenate(columns)), np.concatenate(signs))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def make_embedder(name, client=None):
+    """Build an embedder by name: 'openai' (needs a client) or 'hashing'."""
+    if name == 'openai':
+        return OpenAIEmbedder(client)
+    if name == 'hashing':
+        return HashingEmbedder()
+    raise ValueError(f'Unknown embedder: {name}')
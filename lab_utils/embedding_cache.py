@@ -0,0 +1,110 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from lab_utils.resources import shared
+
+DEFAULT_DB_PATH = os.path.join('.cache', 'query_embeddings.sqlite3')
+DEFAULT_MEMORY_ITEMS = 1024
+
+
+def normalize_query(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    text = re.sub(r'\s+', ' ', text.strip().lower())
+    return text.rstrip(' ?!.')
+
+
+class QueryEmbeddingCache:
+    """
+    Cache of query embeddings keyed on (normalized text, model).
+    In-process LRU in front of a SQLite file; vectors are stored as float32 blobs.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, memory_items=DEFAULT_MEMORY_ITEMS):
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key_for(text, model):
+        return hashlib.sha256(f'{model}\0{normalize_query(text)}'.encode()).hexdigest()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, text, model):
+        """Return the cached float32 vector, or None."""
+        key = self.key_for(text, model)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            vector = np.frombuffer(row[0], dtype=np.float32)
+            self._remember(key, vector)
+            self.disk_hits += 1
+            return vector
+
+    def peek(self, text, model):
+        """Like get, but leaves the hit/miss counters and LRU order untouched."""
+        key = self.key_for(text, model)
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            return None if row is None else np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, text, model, vector):
+        key = self.key_for(text, model)
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?)", (key, vector.tobytes())
+            )
+            self._conn.commit()
+
+    def embed(self, embedder, text):
+        """Return the embedding for `text`, calling the embedder only on a miss."""
+        vector = self.get(text, embedder.model)
+        if vector is None:
+            vector = np.asarray(embedder.embed_one(text), dtype=np.float32)
+            self.put(text, embedder.model, vector)
+        return vector
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def get_query_embedding_cache():
+    """Return the process-wide QueryEmbeddingCache, shared by every Streamlit session."""
+    return shared('embedding_cache', QueryEmbeddingCache)
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from lab_utils.resources import shared
+
+# Default location and limits for the shared extraction cache
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'extractions')
+DEFAULT_MEMORY_ITEMS = 32
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024  # 256 MB
+
+
+def content_hash(data):
+    """Hash raw file bytes so identical uploads share one cache entry."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Two-tier cache of extracted document text keyed by content hash.
+    Memory tier: small LRU of recent documents.
+    Disk tier: one file per document, oldest-used files evicted past a size limit.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, memory_items=DEFAULT_MEMORY_ITEMS,
+                 disk_bytes=DEFAULT_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.txt')
+
+    def _remember(self, key, text):
+        """Insert into the memory LRU, dropping the least recently used entry."""
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return cached text for `key`, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+            path = self._path(key)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    text = f.read()
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+
+            # Touch the file so disk eviction sees it as recently used
+            os.utime(path)
+            self._remember(key, text)
+            self.disk_hits += 1
+            return text
+
+    def put(self, key, text):
+        """Store text in both tiers, then enforce the disk size limit."""
+        with self._lock:
+            self._remember(key, text)
+            path = self._path(key)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete least recently used files until the disk tier fits its budget."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.txt'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get_or_extract(self, data, extract):
+        """Return cached text for `data`, calling `extract(data)` only on a miss."""
+        key = content_hash(data)
+        text = self.get(key)
+        if text is None:
+            text = extract(data)
+            self.put(key, text)
+        return text
+
+    def stats(self):
+        """Hit/miss counters and current tier sizes, for sizing the cache."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                'memory_items': len(self._memory),
+            }
+
+
+def get_extraction_cache():
+    """Return the process-wide ExtractionCache, shared by every Streamlit session."""
+    return shared('extraction_cache', ExtractionCache)
@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from lab_utils.embedding_cache import normalize_query
+from lab_utils.tokens import count_tokens
+from lab_utils.resources import shared
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+def recommendation_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class FollowupCache:
+    """
+    In-process LRU of follow-up answers keyed on
+    (recommendation hash, normalized question, model).
+    Also counts how many recommendation tokens were re-sent to the model
+    and how many a cache hit avoided sending.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (answer, recommendation tokens)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_resent = 0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def key_for(recommendation, question, model):
+        return recommendation_hash(recommendation), normalize_query(question), model
+
+    def get(self, recommendation, question, model):
+        """Return the cached answer, or None."""
+        key = self.key_for(recommendation, question, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.tokens_saved += entry[1]
+            return entry[0]
+
+    def put(self, recommendation, question, model, answer):
+        """Store an answer that was generated with `recommendation` sent as context."""
+        key = self.key_for(recommendation, question, model)
+        # tiktoken count: exact for OpenAI models, an estimate for Claude
+        recommendation_tokens = count_tokens(recommendation)
+        with self._lock:
+            self.tokens_resent += recommendation_tokens
+            self._entries[key] = (answer, recommendation_tokens)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'recommendation_tokens_resent': self.tokens_resent,
+            'recommendation_tokens_saved': self.tokens_saved,
+        }
+
+
+def get_followup_cache():
+    """Return the process-wide FollowupCache, shared by every Streamlit session."""
+    return shared('followup_cache', FollowupCache)
@@ -0,0 +1,110 @@
+import re
+
+from lab_utils.tokens import get_encoding, split_by_tokens
+
+EMBEDDING_MODEL = 'text-embedding-3-small'
+
+# Chunking defaults for syllabus ingestion
+DEFAULT_CHUNK_TOKENS = 500
+DEFAULT_OVERLAP_TOKENS = 75
+
+# Per-request limits of the embeddings endpoint
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+
+# Rows per collection.add call
+DEFAULT_WRITE_BATCH = 1000
+
+# Lines that look like syllabus section headings
+HEADING_PATTERN = re.compile(r'^(week|module|unit|part|section)\s+\d+\b', re.IGNORECASE)
+
+
+# ============================================
+# CHUNKING
+# ============================================
+def is_heading(line):
+    """Heuristic: short line that is all caps, ends with a colon, or starts 'Week N' etc."""
+    line = line.strip()
+    if not 3 <= len(line) <= 60 or line.endswith('.'):
+        return False
+    letters = [c for c in line if c.isalpha()]
+    return bool(letters) and (line.isupper() or line.endswith(':') or bool(HEADING_PATTERN.match(line)))
+
+
+def split_sections(text):
+    """Split text at heading lines. Returns a list of (heading, body) pairs."""
+    sections = []
+    heading, lines = '', []
+    for line in text.splitlines():
+        if is_heading(line):
+            if any(l.strip() for l in lines):
+                sections.append((heading, '\n'.join(lines)))
+            heading, lines = line.strip().rstrip(':'), [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((heading, '\n'.join(lines)))
+    return sections
+
+
+def chunk_document(text, source, chunk_tokens=DEFAULT_CHUNK_TOKENS,
+                   overlap_tokens=DEFAULT_OVERLAP_TOKENS, model=EMBEDDING_MODEL):
+    """
+    Split one document into overlapping token-bounded chunks, never crossing a
+    section heading. Each chunk is a dict with 'id', 'text' and 'metadata'.
+    """
+    chunks = []
+    for heading, body in split_sections(text):
+        for piece in split_by_tokens(body, chunk_tokens, model, overlap_tokens):
+            if not piece.strip():
+                continue
+            chunks.append({
+                'id': f'{source}::{len(chunks)}',
+                'text': piece,
+                'metadata': {'source': source, 'section': heading, 'chunk': len(chunks)},
+            })
+    return chunks
+
+
+# ============================================
+# EMBEDDING
+# ============================================
+def batch_by_limits(texts, model=EMBEDDING_MODEL, max_inputs=MAX_INPUTS_PER_REQUEST,
+                    max_tokens=MAX_TOKENS_PER_REQUEST, with_tokens=False):
+    """
+    Group texts into consecutive batches that fill the per-request input and token limits.
+    With `with_tokens`, each batch is returned as (texts, token_count).
+    """
+    encoding = get_encoding(model)
+    batches, batch, batch_tokens = [], [], 0
+    for text in texts:
+        tokens = len(encoding.encode(text))
+        if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+            batches.append((batch, batch_tokens))
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append((batch, batch_tokens))
+    if with_tokens:
+        return batches
+    return [batch for batch, _ in batches]
+
+
+# ============================================
+# WRITING
+# ============================================
+def add_chunks(collection, chunks, embeddings, batch_size=DEFAULT_WRITE_BATCH):
+    """
+    Write chunks and their embeddings to a Chroma collection in bulk.
+    Upserts, so re-ingesting a changed file overwrites its existing chunk ids.
+    """
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        collection.upsert(
+            ids=[chunk['id'] for chunk in batch],
+            documents=[chunk['text'] for chunk in batch],
+            metadatas=[chunk['metadata'] for chunk in batch],
+            embeddings=embeddings[start:start + batch_size],
+        )
+
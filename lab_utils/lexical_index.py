@@ -0,0 +1,141 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+# Persisted beside the Chroma store directory
+DEFAULT_INDEX_PATH = './ChromaDB_for_Lab.bm25.json'
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Reciprocal rank fusion constant
+RRF_K = 60
+
+# Department prefixes of the indexed courses. Any-letters patterns also match
+# ordinary text such as "is 100" or "room 220".
+COURSE_DEPARTMENTS = ('ist',)
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+COURSE_CODE_PATTERN = re.compile(rf"\b({'|'.join(COURSE_DEPARTMENTS)})\s*-?\s*(\d{{3}})\b")
+
+
+# ============================================
+# TOKENIZING
+# ============================================
+def course_codes(text):
+    """Course codes in text, normalized to e.g. 'ist343'."""
+    return [f'{dept}{number}' for dept, number in COURSE_CODE_PATTERN.findall(text.lower())]
+
+
+def tokenize(text):
+    """Lowercase word tokens, plus one joined token per course code ('IST 343' -> 'ist343')."""
+    lowered = text.lower()
+    return WORD_PATTERN.findall(lowered) + course_codes(lowered)
+
+
+# ============================================
+# BM25 INDEX
+# ============================================
+class BM25Index:
+    """In-process inverted index with BM25 scoring over a fixed set of documents."""
+
+    def __init__(self, ids, documents, metadatas, term_freqs=None, version=None):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.version = version
+        self.positions = {doc_id: i for i, doc_id in enumerate(ids)}
+        self.term_freqs = term_freqs or [dict(Counter(tokenize(doc))) for doc in documents]
+        self.doc_lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        self.postings = defaultdict(list)
+        for i, tf in enumerate(self.term_freqs):
+            for term, count in tf.items():
+                self.postings[term].append((i, count))
+
+    @classmethod
+    def from_collection(cls, collection, version=None):
+        """Index every document currently stored in a Chroma collection."""
+        data = collection.get(include=['documents', 'metadatas'])
+        metadatas = [m or {} for m in (data['metadatas'] or [{}] * len(data['ids']))]
+        return cls(data['ids'], data['documents'], metadatas, version=version)
+
+    def idf(self, term):
+        n = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.ids) - n + 0.5) / (n + 0.5))
+
+    def search(self, query, k=10, terms=None):
+        """Return up to k (index, score) pairs, best first. `terms` overrides query tokenization."""
+        scores = defaultdict(float)
+        for term in set(terms if terms is not None else tokenize(query)):
+            idf = self.idf(term)
+            for i, tf in self.postings.get(term, ()):
+                norm = K1 * (1 - B + B * self.doc_lengths[i] / (self.avg_length or 1.0))
+                scores[i] += idf * tf * (K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def exact_course_matches(self, query, k=10):
+        """
+        If the query names course codes that appear in the index, return only the
+        documents containing one of them, ranked by BM25; otherwise return [].
+        """
+        codes = [code for code in course_codes(query) if code in self.postings]
+        if not codes:
+            return []
+        matching = {i for code in codes for i, _ in self.postings[code]}
+        ranked = self.search(query, len(self.ids), terms=codes + tokenize(query))
+        return [(i, score) for i, score in ranked if i in matching][:k]
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.version,
+                'ids': self.ids,
+                'documents': self.documents,
+                'metadatas': self.metadatas,
+                'term_freqs': self.term_freqs,
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['ids'], data['documents'], data['metadatas'], data['term_freqs'], data['version'])
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merge ranked id lists; each id scores sum(1 / (k + rank)). Returns ids, best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+# Process-wide index, loaded lazily and rebuilt when the corpus version changes
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_lexical_index(collection, version, path=DEFAULT_INDEX_PATH):
+    """Return the BM25 index for `version`: from memory, from disk, or rebuilt from Chroma."""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is not None and _shared_index.version == version:
+            return _shared_index
+        index = None
+        if os.path.exists(path):
+            index = BM25Index.load(path)
+            if index.version != version:
+                index = None
+        if index is None:
+            index = BM25Index.from_collection(collection, version)
+            index.save(path)
+        _shared_index = index
+        return index
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import time
+
+# Manifest of ingested files, kept beside the Chroma store directory
+DEFAULT_MANIFEST_PATH = './ChromaDB_for_Lab.manifest.json'
+
+
+def load_manifest(path=DEFAULT_MANIFEST_PATH):
+    """Return {file_name: {'hash', 'size', 'mtime', 'chunk_ids'}}, or {} if none exists yet."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest, path=DEFAULT_MANIFEST_PATH):
+    """Write the manifest atomically so a crash never leaves it half-written."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def plan_changes(folder_path, manifest, extension='.pdf'):
+    """
+    Compare a folder with the manifest.
+    Returns (changed, removed): {file_name: (hash, size, mtime)} for new or edited
+    files, and a list of file names in the manifest that no longer exist.
+    Files whose size and mtime match the manifest are not re-hashed.
+    """
+    changed = {}
+    present = set()
+    for file_name in sorted(os.listdir(folder_path)):
+        if not file_name.endswith(extension):
+            continue
+        present.add(file_name)
+        stat = os.stat(os.path.join(folder_path, file_name))
+        entry = manifest.get(file_name)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            continue
+        digest = file_hash(os.path.join(folder_path, file_name))
+        if entry and entry['hash'] == digest:
+            # Touched but not edited: just refresh the recorded mtime
+            entry['mtime'] = stat.st_mtime
+            continue
+        changed[file_name] = (digest, stat.st_size, stat.st_mtime)
+    removed = [file_name for file_name in manifest if file_name not in present]
+    return changed, removed
+
+
+def sync_folder(folder_path, collection, ingest, manifest_path=DEFAULT_MANIFEST_PATH):
+    """
+    Bring a collection in line with a folder of documents.
+    `ingest({name: path})` reads, embeds and stores the given files and returns a
+    report with 'chunk_ids' per name. Only new or edited files are passed to it.
+    Old vectors of edited files are removed only after the re-ingest succeeds, so
+    a failed ingest leaves the collection and manifest as they were. Files the
+    ingest lists under 'failed' keep their old manifest entry and vectors and
+    are retried on the next sync.
+    """
+    started = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    original = json.dumps(manifest, sort_keys=True)
+    changed, removed = plan_changes(folder_path, manifest)
+
+    # Files ingested before the manifest existed were stored under their file name as the id
+    old_ids = {
+        file_name: manifest.get(file_name, {}).get('chunk_ids', [file_name])
+        for file_name in [*changed, *removed]
+    }
+
+    report = {'added_or_updated': sorted(changed), 'removed': sorted(removed)}
+    stale_ids = []
+    if changed:
+        ingest_report = ingest({name: os.path.join(folder_path, name) for name in changed})
+        report['failed'] = ingest_report.get('failed', {})
+        report['added_or_updated'] = sorted(name for name in changed if name not in report['failed'])
+        for name, (digest, size, mtime) in changed.items():
+            if name in report['failed']:
+                continue
+            chunk_ids = ingest_report['chunk_ids'].get(name, [])
+            manifest[name] = {
+                'hash': digest,
+                'size': size,
+                'mtime': mtime,
+                'chunk_ids': chunk_ids,
+            }
+            # Chunks past the new end of an edited file (upserts replaced the rest)
+            kept = set(chunk_ids)
+            stale_ids.extend(i for i in old_ids[name] if i not in kept)
+        report.update({k: v for k, v in ingest_report.items() if k not in ('chunk_ids', 'failed')})
+
+    for file_name in removed:
+        stale_ids.extend(old_ids[file_name])
+        del manifest[file_name]
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+
+    if json.dumps(manifest, sort_keys=True) != original:
+        save_manifest(manifest, manifest_path)
+    report['sync_seconds'] = round(time.perf_counter() - started, 4)
+    return report
+
+
+def content_version(path=DEFAULT_MANIFEST_PATH):
+    """Short hash of every file's content hash; changes whenever the indexed corpus changes."""
+    manifest = load_manifest(path)
+    digest = hashlib.sha256()
+    for file_name in sorted(manifest):
+        digest.update(f"{file_name}\0{manifest[file_name]['hash']}\n".encode())
+    return digest.hexdigest()[:16]
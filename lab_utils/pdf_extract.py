@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+# PDFs with at least this many pages get split across a process pool
+PARALLEL_PAGE_THRESHOLD = 64
+
+# Upper bound on worker processes for one document
+MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# One long-lived pool per process. Workers are spawned, not forked, because the
+# Streamlit server is multithreaded and forking it can copy held locks.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context('spawn')
+                )
+    return _pool
+
+
+# ============================================
+# OPENING DOCUMENTS
+# ============================================
+def open_pdf(source):
+    """Open a PDF from raw bytes or a path on disk."""
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def page_count(source):
+    """Return the number of pages in a PDF."""
+    document = open_pdf(source)
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+
+# ============================================
+# PAGE STREAMING
+# ============================================
+def iter_pages(source, start=0, stop=None, timings=None):
+    """
+    Yield the text of each page in [start, stop) one at a time.
+    If a list is passed as `timings`, (page_num, seconds) is appended per page.
+    """
+    document = open_pdf(source)
+    try:
+        if stop is None or stop > len(document):
+            stop = len(document)
+        for page_num in range(start, stop):
+            began = time.perf_counter()
+            text = document.load_page(page_num).get_text()
+            if timings is not None:
+                timings.append((page_num, time.perf_counter() - began))
+            yield text
+    finally:
+        document.close()
+
+
+def _extract_range(source, start, stop):
+    """Worker: extract one page range and return its pages plus timings."""
+    timings = []
+    pages = list(iter_pages(source, start, stop, timings))
+    return pages, timings
+
+
+def _page_ranges(total, parts):
+    """Split range(total) into `parts` contiguous (start, stop) chunks."""
+    size, extra = divmod(total, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+# ============================================
+# FULL-DOCUMENT EXTRACTION
+# ============================================
+def extract_pages(source, workers=None, parallel_threshold=PARALLEL_PAGE_THRESHOLD):
+    """
+    Extract every page of a PDF.
+    Returns (pages, timings) where timings is a list of (page_num, seconds).
+    Large documents are split by page range across a process pool.
+    """
+    workers = MAX_WORKERS if workers is None else workers
+    total = page_count(source)
+
+    if workers <= 1 or total < parallel_threshold:
+        timings = []
+        pages = list(iter_pages(source, timings=timings))
+        return pages, timings
+
+    # Workers open the file by path so the PDF bytes are not pickled to each one
+    temp_path = None
+    if isinstance(source, (bytes, bytearray)):
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp:
+            temp.write(source)
+        source = temp_path = temp.name
+
+    pages, timings = [], []
+    try:
+        pool = _get_pool()
+        futures = [
+            pool.submit(_extract_range, source, start, stop)
+            for start, stop in _page_ranges(total, min(workers, MAX_WORKERS))
+        ]
+        # Collect in submission order so pages stay in document order
+        for future in futures:
+            chunk_pages, chunk_timings = future.result()
+            pages.extend(chunk_pages)
+            timings.extend(chunk_timings)
+    finally:
+        if temp_path is not None:
+            os.remove(temp_path)
+    return pages, timings
+
+
+def extract_text(source, workers=None, parallel_threshold=PARALLEL_PAGE_THRESHOLD):
+    """Extract the full text of a PDF, joined in linear time."""
+    pages, _ = extract_pages(source, workers, parallel_threshold)
+    return ''.join(pages)
+
+
+def timing_report(timings, top=5):
+    """Summarize per-page timings: page count, total seconds and slowest pages."""
+    slowest = sorted(timings, key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'pages': len(timings),
+        'total_seconds': round(sum(seconds for _, seconds in timings), 4),
+        'slowest_pages': [(page_num + 1, round(seconds, 4)) for page_num, seconds in slowest],
+    }
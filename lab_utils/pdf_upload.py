@@ -0,0 +1,20 @@
+import streamlit as st
+
+from lab_utils.extraction_cache import get_extraction_cache
+from lab_utils.pdf_extract import extract_pages, timing_report
+
+
+def parse_pdf(pdf_bytes):
+    """Run PyMuPDF over raw PDF bytes and report per-page timings in the sidebar."""
+    pages, timings = extract_pages(pdf_bytes)
+    report = timing_report(timings)
+    st.sidebar.caption(
+        f"PDF extraction: {report['pages']} pages in {report['total_seconds']}s "
+        f"(slowest pages: {report['slowest_pages']})"
+    )
+    return ''.join(pages)
+
+
+def read_pdf(uploaded_file):
+    """Extract text from an uploaded PDF file, reusing cached text for repeat uploads."""
+    return get_extraction_cache().get_or_extract(uploaded_file.getvalue(), parse_pdf)
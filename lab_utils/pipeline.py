@@ -0,0 +1,207 @@
+import multiprocessing
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import openai
+
+from lab_utils.ingest import (
+    DEFAULT_CHUNK_TOKENS,
+    DEFAULT_OVERLAP_TOKENS,
+    DEFAULT_WRITE_BATCH,
+    add_chunks,
+    batch_by_limits,
+    chunk_document,
+)
+from lab_utils.pdf_extract import extract_text
+
+# Pipeline defaults
+DEFAULT_PARSE_WORKERS = 4
+DEFAULT_EMBED_WORKERS = 4
+DEFAULT_REQUESTS_PER_MINUTE = 3000
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+MAX_RETRIES = 5
+
+# Errors worth retrying with backoff
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+# ============================================
+# RATE LIMITING
+# ============================================
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = rate_per_minute
+        self.available = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        """Block until `amount` can be taken from the bucket."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(wait)
+
+
+# ============================================
+# STAGES
+# ============================================
+def parse_and_chunk(name, path, chunk_tokens, overlap_tokens):
+    """Process-pool stage: extract one PDF and split it into chunks."""
+    return chunk_document(extract_text(path, workers=1), name, chunk_tokens, overlap_tokens)
+
+
+def embed_with_retry(embedder, texts, request_bucket, token_bucket, token_count):
+    """Embed one batch, waiting on the rate limits and retrying transient errors with backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        request_bucket.acquire()
+        token_bucket.acquire(token_count)
+        try:
+            return embedder.embed(texts).tolist()
+        except RETRYABLE_ERRORS:
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(min(30, 2 ** attempt) + random.random())
+
+
+def writer(collection, rows, batch_size, written, errors):
+    """
+    Single writer thread: drain (chunks, embeddings) from the queue into Chroma in batches.
+    If a write fails, the exception is appended to `errors` and the rest of the
+    queue is drained without writing, so producers never block on a full queue.
+    """
+    pending_chunks, pending_embeddings = [], []
+    while True:
+        item = rows.get()
+        if errors:
+            if item is None:
+                return
+            continue
+        if item is not None:
+            chunks, embeddings = item
+            pending_chunks.extend(chunks)
+            pending_embeddings.extend(embeddings)
+        if pending_chunks and (item is None or len(pending_chunks) >= batch_size):
+            try:
+                add_chunks(collection, pending_chunks, pending_embeddings, batch_size)
+            except Exception as e:
+                errors.append(e)
+            else:
+                written.append(len(pending_chunks))
+            pending_chunks, pending_embeddings = [], []
+        if item is None:
+            return
+
+
+def _put(rows, item, writer_thread, timeout=1.0):
+    """Queue an item for the writer, failing instead of blocking forever if it has stopped."""
+    while True:
+        try:
+            rows.put(item, timeout=timeout)
+            return
+        except queue.Full:
+            if not writer_thread.is_alive():
+                raise RuntimeError('Chroma writer thread stopped unexpectedly')
+
+
+def run_pipeline(embedder, collection, paths, chunk_tokens=DEFAULT_CHUNK_TOKENS,
+                 overlap_tokens=DEFAULT_OVERLAP_TOKENS, parse_workers=DEFAULT_PARSE_WORKERS,
+                 embed_workers=DEFAULT_EMBED_WORKERS, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, write_batch=DEFAULT_WRITE_BATCH):
+    """
+    Ingest {name: path} through three stages:
+    parse/chunk in a process pool -> embed on a rate-limited thread pool -> one writer thread.
+    Returns a report dict with 'documents', 'chunks', 'embedding_requests',
+    'write_batches', 'seconds', 'chunks_per_second', 'chunk_ids' ({name: ids written})
+    and 'failed' ({name: error} for files that could not be parsed; the other files
+    are still ingested). Raises if any chunk could not be written, so callers never
+    record unwritten chunks as ingested.
+    """
+    started = time.perf_counter()
+    request_bucket = TokenBucket(requests_per_minute)
+    token_bucket = TokenBucket(tokens_per_minute)
+    rows = queue.Queue(maxsize=embed_workers * 2)
+    written, errors = [], []
+    writer_thread = threading.Thread(
+        target=writer, args=(collection, rows, write_batch, written, errors), daemon=True
+    )
+    writer_thread.start()
+
+    chunk_ids = {name: [] for name in paths}
+    failed = {}
+    requests = 0
+    # Spawned, not forked: the Streamlit server and the writer thread are already running
+    spawn = multiprocessing.get_context('spawn')
+    try:
+        with ProcessPoolExecutor(max_workers=parse_workers, mp_context=spawn) as parsers, \
+                ThreadPoolExecutor(max_workers=embed_workers) as embedders:
+            parsed = [
+                (name, parsers.submit(parse_and_chunk, name, path, chunk_tokens, overlap_tokens))
+                for name, path in paths.items()
+            ]
+
+            # Embed each file's chunks as soon as that file is parsed;
+            # a file that cannot be parsed is skipped and reported
+            embedding = []
+            for name, future in parsed:
+                if future.exception() is not None:
+                    failed[name] = repr(future.exception())
+                    del chunk_ids[name]
+                    continue
+                chunks = future.result()
+                for chunk in chunks:
+                    chunk_ids[chunk['metadata']['source']].append(chunk['id'])
+                start = 0
+                texts_by_batch = batch_by_limits([chunk['text'] for chunk in chunks], embedder.model, with_tokens=True)
+                for texts, tokens in texts_by_batch:
+                    batch = chunks[start:start + len(texts)]
+                    start += len(texts)
+                    job = embedders.submit(embed_with_retry, embedder, texts, request_bucket, token_bucket, tokens)
+                    embedding.append((batch, job))
+                    requests += 1
+
+            for batch, job in embedding:
+                if errors:
+                    # The writer has failed: skip embedding batches that have not started
+                    for _, pending in embedding:
+                        pending.cancel()
+                    break
+                _put(rows, (batch, job.result()), writer_thread)
+    finally:
+        if writer_thread.is_alive():
+            _put(rows, None, writer_thread)
+            writer_thread.join()
+
+    if errors:
+        raise errors[0]
+
+    chunk_count = sum(len(ids) for ids in chunk_ids.values())
+    seconds = time.perf_counter() - started
+    return {
+        'documents': len(chunk_ids),
+        'chunks': chunk_count,
+        'embedding_requests': requests,
+        'write_batches': len(written),
+        'seconds': round(seconds, 2),
+        'chunks_per_second': round(chunk_count / seconds, 1) if seconds else 0.0,
+        'chunk_ids': chunk_ids,
+        'failed': failed,
+    }
@@ -0,0 +1,177 @@
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from lab_utils.resources import shared
+
+GENRES = ["Action", "Comedy", "Horror", "Drama", "Sci-Fi", "Thriller", "Romance"]
+MOODS = ["Excited", "Happy", "Sad", "Bored", "Scared", "Romantic", "Curious", "Tense", "Melancholy"]
+PERSONAS = ["Film Critic", "Casual Friend", "Movie Journalist"]
+
+DEFAULT_DB_PATH = os.path.join('.cache', 'recommendations.sqlite3')
+DEFAULT_TTL_SECONDS = 24 * 60 * 60  # refresh each combination once a day
+DEFAULT_MAX_CONCURRENCY = 4
+WARM_UP_BATCH_SIZE = 21  # results are saved after every batch
+
+
+def all_preferences():
+    """Every (genre, mood, persona) the sidebar can produce: 7 x 9 x 3 = 189."""
+    return list(itertools.product(GENRES, MOODS, PERSONAS))
+
+
+class RecommendationStore:
+    """
+    Persistent store of generated recommendations keyed on (genre, mood, persona, model).
+    Entries older than the TTL are still served but reported as stale so the
+    caller can refresh them in the background.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS recommendations (
+                genre TEXT NOT NULL,
+                mood TEXT NOT NULL,
+                persona TEXT NOT NULL,
+                model TEXT NOT NULL,
+                recommendation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (genre, mood, persona, model)
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, genre, mood, persona, model):
+        """Return (recommendation, is_stale), or None if nothing is stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT recommendation, created_at FROM recommendations "
+                "WHERE genre = ? AND mood = ? AND persona = ? AND model = ?",
+                (genre, mood, persona, model),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            is_stale = time.time() - row[1] > self.ttl_seconds
+            if is_stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return row[0], is_stale
+
+    def put(self, genre, mood, persona, model, recommendation):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?, ?, ?)",
+                (genre, mood, persona, model, recommendation, time.time()),
+            )
+            self._conn.commit()
+
+    def needs_refresh(self, model, keys):
+        """The subset of (genre, mood, persona) keys that are missing or stale for `model`."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            fresh = set(self._conn.execute(
+                "SELECT genre, mood, persona FROM recommendations "
+                "WHERE model = ? AND created_at >= ?",
+                (model, cutoff),
+            ).fetchall())
+        return [key for key in keys if tuple(key) not in fresh]
+
+    def count(self, model):
+        """Number of stored combinations for `model`, fresh or stale."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM recommendations WHERE model = ?", (model,)
+            ).fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters for this process."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+# ============================================
+# WARM-UP
+# ============================================
+
+_in_flight = set()  # (genre, mood, persona, model) currently being generated
+_in_flight_lock = threading.Lock()
+
+# Summary of the most recent warm-up run, by model
+last_reports = {}
+
+
+def warm_up(chain, store, model, keys=None, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+            batch_size=WARM_UP_BATCH_SIZE):
+    """
+    Generate every missing or stale combination with `chain.batch`, at most
+    `max_concurrency` model calls at a time. Failed combinations are skipped
+    and left for the next run. Returns a report dict.
+    """
+    keys = store.needs_refresh(model, all_preferences() if keys is None else keys)
+    started = time.perf_counter()
+    filled, failed = 0, 0
+    for i in range(0, len(keys), batch_size):
+        batch = keys[i:i + batch_size]
+        results = chain.batch(
+            [{'genre': g, 'mood': m, 'persona': p} for g, m, p in batch],
+            config={'max_concurrency': max_concurrency},
+            return_exceptions=True,
+        )
+        for (genre, mood, persona), result in zip(batch, results):
+            if isinstance(result, Exception):
+                failed += 1
+            else:
+                store.put(genre, mood, persona, model, result)
+                filled += 1
+    report = {
+        'requested': len(keys),
+        'filled': filled,
+        'failed': failed,
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+    last_reports[model] = report
+    return report
+
+
+def start_warm_up(chain, store, model, keys=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Run warm_up on a background thread for the keys no other warm-up is already
+    generating. Returns the thread, or None if there was nothing left to do.
+    """
+    keys = store.needs_refresh(model, all_preferences() if keys is None else keys)
+    with _in_flight_lock:
+        claimed = [key for key in keys if (*key, model) not in _in_flight]
+        _in_flight.update((*key, model) for key in claimed)
+    if not claimed:
+        return None
+
+    def run():
+        try:
+            warm_up(chain, store, model, claimed, max_concurrency)
+        finally:
+            with _in_flight_lock:
+                _in_flight.difference_update((*key, model) for key in claimed)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def get_recommendation_store():
+    """Return the process-wide RecommendationStore, shared by every Streamlit session."""
+    return shared('recommendation_store', RecommendationStore)
@@ -0,0 +1,116 @@
+import sys
+import threading
+import time
+
+from openai import OpenAI
+
+DEFAULT_DB_PATH = './ChromaDB_for_Lab'
+DEFAULT_COLLECTION = 'Lab4Collection'
+
+# HNSW index parameters for new collections. space, max_neighbors (M) and
+# ef_construction are fixed once a collection exists; ef_search can change.
+DEFAULT_HNSW = {
+    'space': 'cosine',
+    'max_neighbors': 16,
+    'ef_construction': 100,
+    'ef_search': 100,
+}
+
+_resources = {}
+_locks = {}  # name -> Lock held only while that resource is being created
+_locks_guard = threading.Lock()
+
+# Seconds each shared resource took to create (cold) or warm, by name
+timings = {}
+
+
+def shared(name, factory):
+    """
+    Process-wide lazy singleton: the first caller runs `factory()` under a lock,
+    every later caller (any session, any thread) gets the same object back.
+    Each name has its own lock, so a slow factory (e.g. a cold folder sync) only
+    blocks callers waiting for that same resource.
+    """
+    if name in _resources:
+        return _resources[name]
+    with _locks_guard:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        if name not in _resources:
+            started = time.perf_counter()
+            _resources[name] = factory()
+            timings[name] = round(time.perf_counter() - started, 4)
+        return _resources[name]
+
+
+def _use_pysqlite3():
+    """sqlite3 fix - swap in pysqlite3 before chromadb is imported (once per process)."""
+    if 'chromadb' in sys.modules:
+        return
+    try:
+        __import__('pysqlite3')
+        sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+    except ImportError:
+        pass
+
+
+def get_collection(path=DEFAULT_DB_PATH, name=DEFAULT_COLLECTION, hnsw=None):
+    """
+    Shared Chroma collection backed by one PersistentClient per path.
+    `hnsw` overrides DEFAULT_HNSW when the collection is created. For an existing
+    collection only an explicitly passed ef_search is applied (an operator change,
+    e.g. from build_index); otherwise the persisted setting is left alone.
+    """
+    new_ef_search = (hnsw or {}).get('ef_search')
+    hnsw = {**DEFAULT_HNSW, **(hnsw or {})}
+
+    def create():
+        _use_pysqlite3()
+        import chromadb
+        client = shared(f'chroma_client:{path}', lambda: chromadb.PersistentClient(path=path))
+        collection = client.get_or_create_collection(name, configuration={'hnsw': hnsw})
+        if new_ef_search is not None:
+            set_ef_search(collection, new_ef_search)
+        return collection
+    return shared(f'collection:{path}:{name}', create)
+
+
+def hnsw_settings(collection):
+    """The HNSW parameters a collection is actually using."""
+    return dict((collection.configuration or {}).get('hnsw') or {})
+
+
+def set_ef_search(collection, ef_search):
+    """Change the search-time ef of an existing collection if it differs."""
+    if hnsw_settings(collection).get('ef_search') != ef_search:
+        collection.modify(configuration={'hnsw': {'ef_search': ef_search}})
+
+
+def get_openai_client(api_key):
+    """Shared OpenAI client; it is thread-safe and pools its HTTP connections."""
+    return shared(f'openai:{hash(api_key)}', lambda: OpenAI(api_key=api_key))
+
+
+def prewarm_collection(path=DEFAULT_DB_PATH, name=DEFAULT_COLLECTION):
+    """Open the collection and run one query so the HNSW segment is loaded before a user asks."""
+    def warm():
+        collection = get_collection(path, name)
+        sample = collection.peek(1)
+        embeddings = sample.get('embeddings')
+        if embeddings is not None and len(embeddings):
+            collection.query(query_embeddings=[list(embeddings[0])], n_results=1)
+        return True
+    return shared(f'prewarm:{path}:{name}', warm)
+
+
+def start_prewarm(path=DEFAULT_DB_PATH, name=DEFAULT_COLLECTION):
+    """
+    Pre-warm on a background thread (once per process) so the calling script run
+    is not blocked. Streamlit runs the entry script per session, so this starts on
+    the first session's run after the server starts, not at server start itself.
+    """
+    def start():
+        thread = threading.Thread(target=prewarm_collection, args=(path, name), daemon=True)
+        thread.start()
+        return thread
+    return shared(f'prewarm_thread:{path}:{name}', start)
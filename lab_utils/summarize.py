@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# Default concurrency for chunked (map-reduce) summarization
+DEFAULT_MAX_WORKERS = 4
+
+MAP_PROMPT = (
+    "Summarize the following section of a longer document. Keep every key fact, "
+    "name, date and requirement, but be concise:\n\n{chunk}"
+)
+
+REDUCE_PROMPT = (
+    "The following are summaries of consecutive sections of one document. "
+    "Combine them into a single summary of the whole document {instruction}:\n\n{summaries}"
+)
+
+
+# ============================================
+# MAP STEP
+# ============================================
+def summarize_chunk(client, chunk, model):
+    """Summarize one chunk. Returns (summary, total_tokens)."""
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": MAP_PROMPT.format(chunk=chunk)}],
+    )
+    tokens = response.usage.total_tokens if response.usage else 0
+    return response.choices[0].message.content, tokens
+
+
+def map_chunks(client, chunks, model, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Summarize all chunks concurrently on a bounded thread pool.
+    Returns (summaries in document order, total_tokens).
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda chunk: summarize_chunk(client, chunk, model), chunks))
+    summaries = [summary for summary, _ in results]
+    return summaries, sum(tokens for _, tokens in results)
+
+
+# ============================================
+# REDUCE STEP
+# ============================================
+def stream_reduce(client, summaries, instruction, model, usage=None):
+    """
+    Stream the final combined summary as text.
+    If a dict is passed as `usage`, its 'total_tokens' is set once the stream ends.
+    """
+    joined = "\n\n".join(f"Section {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": REDUCE_PROMPT.format(
+            instruction=instruction, summaries=joined)}],
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    for chunk in stream:
+        if chunk.usage and usage is not None:
+            usage['total_tokens'] = chunk.usage.total_tokens
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
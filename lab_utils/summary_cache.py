@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+import time
+
+from lab_utils.resources import shared
+
+DEFAULT_DB_PATH = os.path.join('.cache', 'summaries.sqlite3')
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60  # one week
+DEFAULT_MAX_ENTRIES = 500
+
+
+class SummaryCache:
+    """
+    Persistent cache of finished summaries keyed on
+    (document content hash, summary format, model name, summarization mode).
+    Entries expire after a TTL; past max_entries the least recently used are evicted.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries_by_mode (
+                doc_hash TEXT NOT NULL,
+                summary_type TEXT NOT NULL,
+                model TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (doc_hash, summary_type, model, mode)
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, doc_hash, summary_type, model, mode):
+        """Return the cached summary, or None if missing or expired."""
+        now = time.time()
+        key = (doc_hash, summary_type, model, mode)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created_at FROM summaries_by_mode "
+                "WHERE doc_hash = ? AND summary_type = ? AND model = ? AND mode = ?",
+                key,
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute(
+                        "DELETE FROM summaries_by_mode "
+                        "WHERE doc_hash = ? AND summary_type = ? AND model = ? AND mode = ?",
+                        key,
+                    )
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE summaries_by_mode SET last_used = ? "
+                "WHERE doc_hash = ? AND summary_type = ? AND model = ? AND mode = ?",
+                (now, *key),
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, doc_hash, summary_type, model, mode, summary):
+        """Store a finished summary and evict least recently used entries past the limit."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries_by_mode VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_hash, summary_type, model, mode, summary, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM summaries_by_mode WHERE rowid IN ("
+                "SELECT rowid FROM summaries_by_mode ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """Hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def replay_stream(text):
+    """Yield cached text line by line for st.write_stream, with no artificial delay."""
+    yield from text.splitlines(keepends=True)
+
+
+def get_summary_cache():
+    """Return the process-wide SummaryCache, shared by every Streamlit session."""
+    return shared('summary_cache', SummaryCache)
@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+
+
+class RequestTimer:
+    """
+    Per-request latency breakdown: named stages plus time to first token.
+    All times are reported in milliseconds from when the timer was created.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.first_token = None
+
+    @contextmanager
+    def stage(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - began
+
+    def mark_first_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter() - self.started
+
+    def stream_text(self, stream, name='generate'):
+        """
+        Yield text from an OpenAI chat completion stream, recording time to
+        first token and the whole stream's duration as stage `name`.
+        """
+        began = time.perf_counter()
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    self.mark_first_token()
+                    yield chunk.choices[0].delta.content
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - began
+
+    def stream_chunks(self, stream, name='generate'):
+        """Like stream_text, for streams that already yield strings (e.g. LangChain `.stream()`)."""
+        began = time.perf_counter()
+        try:
+            for chunk in stream:
+                if chunk:
+                    self.mark_first_token()
+                    yield chunk
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - began
+
+    def report(self):
+        report = {f'{name}_ms': round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        if self.first_token is not None:
+            report['time_to_first_token_ms'] = round(self.first_token * 1000, 1)
+        report['total_ms'] = round((time.perf_counter() - self.started) * 1000, 1)
+        return report
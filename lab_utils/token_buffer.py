@@ -0,0 +1,77 @@
+from bisect import bisect_left
+from itertools import accumulate
+
+from lab_utils.tokens import get_encoding
+
+MESSAGE_OVERHEAD = 4  # tokens added per message
+CONVERSATION_OVERHEAD = 2  # tokens added once per request
+
+# Key on each stored message holding its cached token counts by encoding name
+TOKENS_KEY = "tokens"
+
+
+# ============================================
+# TOKEN COUNTING
+# ============================================
+def message_tokens(message, model="gpt-4o"):
+    """
+    Token cost of one message including overhead.
+    The count is cached on the message, so each message is tokenized once per encoding.
+    """
+    encoding = get_encoding(model)
+    counts = message.setdefault(TOKENS_KEY, {})
+    if encoding.name not in counts:
+        counts[encoding.name] = MESSAGE_OVERHEAD + len(encoding.encode(message["content"]))
+    return counts[encoding.name]
+
+
+def make_message(role, content, model="gpt-4o"):
+    """Build a chat message with its token count cached on it."""
+    message = {"role": role, "content": content}
+    message_tokens(message, model)
+    return message
+
+
+def count_messages_tokens(messages, model="gpt-4o"):
+    """Count total tokens across all messages."""
+    return sum(message_tokens(message, model) for message in messages) + CONVERSATION_OVERHEAD
+
+
+def to_api_messages(messages):
+    """Strip cached token counts so messages can be sent to the API."""
+    return [{"role": message["role"], "content": message["content"]} for message in messages]
+
+
+# ============================================
+# TOKEN BUFFER
+# ============================================
+def apply_token_buffer(messages, max_tokens, model="gpt-4o"):
+    """
+    Trim conversation history to stay under token limit.
+    Removes oldest messages first, preserves system message.
+    Uses prefix sums of cached per-message counts and a bisect to find
+    the first message to keep, instead of re-counting after every removal.
+    """
+    if len(messages) <= 1:
+        return messages
+
+    # Preserve system message if present
+    system_msg = None
+    if messages[0]["role"] == "system":
+        system_msg = messages[0]
+        working_messages = messages[1:]
+    else:
+        working_messages = messages[:]
+
+    fixed = CONVERSATION_OVERHEAD + (message_tokens(system_msg, model) if system_msg else 0)
+    prefix = [0, *accumulate(message_tokens(message, model) for message in working_messages)]
+
+    # Keep working_messages[start:], the longest suffix with
+    # fixed + prefix[-1] - prefix[start] <= max_tokens, but always keep the last message
+    start = bisect_left(prefix, fixed + prefix[-1] - max_tokens)
+    start = min(start, len(working_messages) - 1)
+    working_messages = working_messages[start:]
+
+    if system_msg:
+        return [system_msg] + working_messages
+    return working_messages
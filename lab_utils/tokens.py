@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+import tiktoken
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model):
+    """Return the tiktoken encoding for a model, falling back to o200k_base.
+    Loaded once per model and reused for the life of the process."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text, model="gpt-5-mini"):
+    """Count tokens in a string."""
+    return len(get_encoding(model).encode(text))
+
+
+def split_by_tokens(text, chunk_tokens, model="gpt-5-mini", overlap_tokens=0):
+    """
+    Split text into chunks of at most `chunk_tokens` tokens.
+    Consecutive chunks share `overlap_tokens` tokens.
+    """
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+    step = max(1, chunk_tokens - overlap_tokens)
+    chunks = []
+    for start in range(0, len(tokens), step):
+        chunks.append(encoding.decode(tokens[start:start + chunk_tokens]))
+        if start + chunk_tokens >= len(tokens):
+            break
+    return chunks
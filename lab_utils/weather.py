@@ -0,0 +1,176 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lab_utils.resources import shared
+
+WEATHER_URL = 'https://api.openweathermap.org/data/2.5/weather'
+DEFAULT_TTL_SECONDS = 600  # current conditions change slowly
+DEFAULT_MAX_ENTRIES = 512
+TIMEOUT = (3.05, 10)  # (connect, read) seconds
+CALL_TIMEOUT = 15  # seconds to wait for one lookup when fanning out
+MAX_WORKERS = 8
+
+# Bounded pool shared by every fan-out of weather lookups
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='weather')
+
+# One pooled session for every lookup in the process
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+def normalize_location(location):
+    """'  syracuse ,NY, us ' -> 'syracuse, ny, us'"""
+    parts = [re.sub(r'\s+', ' ', part).strip() for part in location.lower().split(',')]
+    return ', '.join(part for part in parts if part)
+
+
+# location in form City, State, Country
+# e.g., Syracuse, NY, US
+# default units is degrees Fahrenheit
+def fetch_current_weather(location, api_key, units='imperial'):
+    """Call OpenWeatherMap directly (no cache)."""
+    response = _session.get(
+        WEATHER_URL,
+        params={'q': location, 'appid': api_key, 'units': units},
+        timeout=TIMEOUT,
+    )
+    if response.status_code == 401:
+        raise Exception('Authentication failed: Invalid API key (401 Unauthorized)')
+    if response.status_code == 404:
+        error_message = response.json().get('message')
+        raise Exception(f'404 error: {error_message}')
+    data = response.json()
+    temp = data['main']['temp']
+    feels_like = data['main']['feels_like']
+    temp_min = data['main']['temp_min']
+    temp_max = data['main']['temp_max']
+    humidity = data['main']['humidity']
+    return {'location': location,
+        'temperature': round(temp, 2),
+        'feels_like': round(feels_like, 2),
+        'temp_min': round(temp_min, 2),
+        'temp_max': round(temp_max, 2),
+        'humidity': round(humidity, 2)
+        }
+
+
+class WeatherCache:
+    """
+    TTL cache of weather lookups keyed on (normalized location, units).
+    Concurrent misses for the same key are coalesced into one upstream call.
+    A caller can ask for fresher data with `max_age` on get() without changing
+    the shared ttl_seconds other sessions rely on. Entries past the TTL are
+    dropped, and past max_entries the least recently used are evicted.
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, fetch=fetch_current_weather,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.fetch = fetch
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (fetched_at, result)
+        self._in_flight = {}  # key -> (Event, result holder)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def get(self, location, api_key, units='imperial', max_age=None):
+        """Cached weather no older than `max_age` seconds (default: ttl_seconds)."""
+        max_age = self.ttl_seconds if max_age is None else max_age
+        key = (normalize_location(location), units)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] >= self.ttl_seconds:
+                del self._entries[key]
+            elif entry and time.monotonic() - entry[0] < max_age:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1], location=location)
+            waiting = self._in_flight.get(key)
+            if waiting is None:
+                waiting = (threading.Event(), {})
+                self._in_flight[key] = waiting
+                leader = True
+                self.upstream_calls += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        done, holder = waiting
+        if leader:
+            try:
+                holder['result'] = self.fetch(location, api_key, units)
+                with self._lock:
+                    self._put(key, holder['result'])
+            except Exception as e:
+                holder['error'] = e
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                done.set()
+        else:
+            done.wait()
+
+        if 'error' in holder:
+            raise holder['error']
+        return dict(holder['result'], location=location)
+
+    def _put(self, key, result):
+        """Store a result, then drop expired and least recently used entries. Caller holds the lock."""
+        now = time.monotonic()
+        self._entries[key] = (now, result)
+        self._entries.move_to_end(key)
+        for stale in [k for k, (fetched_at, _) in self._entries.items() if now - fetched_at >= self.ttl_seconds]:
+            del self._entries[stale]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.upstream_calls + self.coalesced
+        return {
+            'hits': self.hits,
+            'coalesced': self.coalesced,
+            'upstream_calls': self.upstream_calls,
+            'hit_ratio': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
+
+
+def prefetch(get, location, api_key, units='imperial'):
+    """Start `get(location, api_key, units)` on the shared pool and return its Future."""
+    return _executor.submit(get, location, api_key, units)
+
+
+def fetch_many(get, locations, api_key, units='imperial', timeout=CALL_TIMEOUT):
+    """
+    Run `get(location, api_key, units)` for every location concurrently.
+    Returns one (location, result, error, seconds) tuple per location, in input order;
+    a lookup that fails or exceeds `timeout` gets an error instead of a result.
+    """
+    def timed(location):
+        began = time.perf_counter()
+        return get(location, api_key, units), time.perf_counter() - began
+
+    futures = [(location, _executor.submit(timed, location)) for location in locations]
+    deadline = time.monotonic() + timeout
+    results = []
+    for location, future in futures:
+        try:
+            result, seconds = future.result(timeout=max(0, deadline - time.monotonic()))
+            results.append((location, result, None, seconds))
+        except TimeoutError:
+            results.append((location, None, Exception(f'Timed out after {timeout}s'), None))
+        except Exception as e:
+            results.append((location, None, e, None))
+    return results
+
+
+def get_weather_cache():
+    """Return the process-wide WeatherCache, shared by every Streamlit session."""
+    return shared('weather_cache', WeatherCache)
@@ -1,19 +1,11 @@
 import streamlit as st
 from openai import OpenAI
-import fitz  # PyMuPDF
+from lab_utils.extraction_cache import get_extraction_cache, content_hash
+from lab_utils.pdf_upload import read_pdf
+from lab_utils.doc_index import DocumentIndex
+from lab_utils.embedders import OpenAIEmbedder
 
-# HW 1
-def read_pdf(uploaded_file):
-    """Extract text from an uploaded PDF file."""
-    # Read the uploaded file bytes and open with PyMuPDF
-    pdf_bytes = uploaded_file.read()
-    document = fitz.open(stream=pdf_bytes, filetype="pdf")
-    text = ''
-    for page_num in range(len(document)):
-        page = document.load_page(page_num)
-        text += page.get_text()
-    document.close()
-    return text
+extraction_cache = get_extraction_cache()
 
 # Show title and description.
 st.title("Lab 1 Document Q/a")
@@ -28,6 +20,7 @@ if not openai_api_key:
 else:
     # Create an OpenAI client.
     client = OpenAI(api_key=openai_api_key)
+    embedder = OpenAIEmbedder(client)
     
     # Validate the API key immediately by making a lightweight API call
     try:
@@ -49,22 +42,49 @@ else:
         disabled=not uploaded_file,
     )
 
+    # Retrieval settings
+    st.sidebar.header("Retrieval")
+    top_k = st.sidebar.slider("Chunks to retrieve (top-k)", min_value=1, max_value=20, value=5)
+    context_budget = st.sidebar.number_input(
+        "Context token budget", min_value=200, max_value=20000, value=2000, step=200
+    )
+
+    # Chunk indexes built this session, keyed by file content hash
+    if "doc_indexes" not in st.session_state:
+        st.session_state.doc_indexes = {}
+
     if uploaded_file and question:
-        # Process the uploaded file based on extension
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-        
-        if file_extension == 'txt':
-            document = uploaded_file.read().decode()
-        elif file_extension == 'pdf':
-            document = read_pdf(uploaded_file)
-        else:
-            st.error("Unsupported file type.")
-            st.stop()
-        
+        # Build the chunk index once per file, then reuse it for every question
+        file_hash = content_hash(uploaded_file.getvalue())
+        if file_hash not in st.session_state.doc_indexes:
+            # Process the uploaded file based on extension
+            file_extension = uploaded_file.name.split('.')[-1].lower()
+
+            if file_extension == 'txt':
+                document = uploaded_file.getvalue().decode()
+            elif file_extension == 'pdf':
+                document = read_pdf(uploaded_file)
+                st.sidebar.caption(f"Extraction cache: {extraction_cache.stats()}")
+            else:
+                st.error("Unsupported file type.")
+                st.stop()
+
+            with st.spinner("Indexing document..."):
+                st.session_state.doc_indexes[file_hash] = DocumentIndex.build(embedder, document)
+        doc_index = st.session_state.doc_indexes[file_hash]
+
+        # Only send the most relevant chunks that fit in the budget
+        excerpts, context_tokens = doc_index.context_for(embedder, question, top_k, context_budget)
+        context = "\n\n...\n\n".join(excerpts)
+        st.sidebar.caption(
+            f"Sent {len(excerpts)} of {len(doc_index.chunks)} chunks "
+            f"({context_tokens} context tokens)"
+        )
+
         messages = [
             {
                 "role": "user",
-                "content": f"Here's a document: {document} \n\n---\n\n {question}",
+                "content": f"Here are the most relevant excerpts from a document: {context} \n\n---\n\n {question}",
             }
         ]
 
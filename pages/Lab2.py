@@ -1,17 +1,14 @@
 import streamlit as st
 from openai import OpenAI
-import fitz  # PyMuPDF
-
-def read_pdf(uploaded_file):
-    """Extract text from an uploaded PDF file."""
-    pdf_bytes = uploaded_file.read()
-    document = fitz.open(stream=pdf_bytes, filetype="pdf")
-    text = ''
-    for page_num in range(len(document)):
-        page = document.load_page(page_num)
-        text += page.get_text()
-    document.close()
-    return text
+from lab_utils.extraction_cache import get_extraction_cache, content_hash
+from lab_utils.pdf_upload import read_pdf
+from lab_utils.summary_cache import get_summary_cache, replay_stream
+from lab_utils.summarize import map_chunks, stream_reduce
+from lab_utils.tokens import split_by_tokens
+import time
+
+extraction_cache = get_extraction_cache()
+summary_cache = get_summary_cache()
 
 # SIDEBAR
 st.sidebar.title(':green[Lab 2: Document Summarizer]')
@@ -22,6 +19,13 @@ summary_type = st.sidebar.selectbox(
     ('100 words', '2 connecting paragraphs', '5 bullet points')
 )
 
+# How each summary format is phrased in the prompt
+SUMMARY_INSTRUCTIONS = {
+    '100 words': 'in exactly 100 words',
+    '2 connecting paragraphs': 'in 2 connecting paragraphs',
+    '5 bullet points': 'in exactly 5 bullet points',
+}
+
 st.sidebar.header(':green[Model Selection]')
 use_advanced_model = st.sidebar.checkbox('Use advanced model')
 
@@ -30,6 +34,16 @@ if use_advanced_model:
 else:
     model_name = "gpt-5-mini"
 
+st.sidebar.header(':green[Long Documents]')
+use_chunked_mode = st.sidebar.checkbox('Chunked mode (map-reduce)')
+chunk_tokens = st.sidebar.number_input('Chunk size (tokens)', min_value=500, max_value=20000, value=3000, step=500)
+max_workers = st.sidebar.slider('Concurrent chunk requests', min_value=1, max_value=8, value=4)
+
+st.sidebar.header(':green[Caching]')
+force_regenerate = st.sidebar.checkbox('Force regenerate (skip cached summary)')
+st.sidebar.caption(f"Extraction cache: {extraction_cache.stats()}")
+st.sidebar.caption(f"Summary cache: {summary_cache.stats()}")
+
 # MAIN PAGE
 st.title(':green[📄 Document Summarizer]')
 st.subheader(':green[Lab 2: AI-Powered Summary Generator]')
@@ -51,33 +65,65 @@ uploaded_file = st.file_uploader(
 
 if uploaded_file:
     if st.button("Generate Summary"):
+        doc_hash = content_hash(uploaded_file.getvalue())
+        instruction = SUMMARY_INSTRUCTIONS[summary_type]
+        # Map-reduce output depends on the chunk size, so it is part of the mode
+        summary_mode = f"map-reduce:{chunk_tokens}" if use_chunked_mode else "single"
+
+        # Replay a finished summary of the same document, format, model and mode
+        cached_summary = None
+        if not force_regenerate:
+            cached_summary = summary_cache.get(doc_hash, summary_type, model_name, summary_mode)
+
+        if cached_summary is not None:
+            st.subheader(f':green[Summary ({summary_type})]')
+            st.write_stream(replay_stream(cached_summary))
+            st.caption("Served from the summary cache. Tick 'Force regenerate' in the sidebar for a fresh one.")
+            st.stop()
+
         # Process the uploaded file
         file_extension = uploaded_file.name.split('.')[-1].lower()
         
         if file_extension == 'txt':
-            document_text = uploaded_file.read().decode()
+            document_text = uploaded_file.getvalue().decode()
         elif file_extension == 'pdf':
             document_text = read_pdf(uploaded_file)
         else:
             st.error("Unsupported file type.")
             st.stop()
-        
-        # Build prompt based on summary type
-        if summary_type == "100 words":
-            prompt = f"Summarize the following document in exactly 100 words:\n\n{document_text}"
-        elif summary_type == "2 connecting paragraphs":
-            prompt = f"Summarize the following document in 2 connecting paragraphs:\n\n{document_text}"
+
+        if use_chunked_mode:
+            # Map: summarize token-bounded chunks in parallel
+            started = time.perf_counter()
+            chunks = split_by_tokens(document_text, chunk_tokens, model_name)
+            with st.spinner(f"Summarizing {len(chunks)} chunks..."):
+                chunk_summaries, map_tokens = map_chunks(client, chunks, model_name, max_workers)
+
+            # Reduce: stream one summary in the selected format
+            reduce_usage = {}
+            st.subheader(f':green[Summary ({summary_type})]')
+            summary = st.write_stream(stream_reduce(client, chunk_summaries, instruction, model_name, reduce_usage))
+
+            reduce_tokens = reduce_usage.get('total_tokens', 0)
+            st.caption(
+                f"{len(chunks)} chunks of up to {chunk_tokens} tokens, {max_workers} concurrent requests | "
+                f"map tokens: {map_tokens}, reduce tokens: {reduce_tokens}, "
+                f"total tokens: {map_tokens + reduce_tokens} | "
+                f"{time.perf_counter() - started:.1f}s"
+            )
         else:
-            prompt = f"Summarize the following document in exactly 5 bullet points:\n\n{document_text}"
-        
-        messages = [{"role": "user", "content": prompt}]
-        
-        # Generate summary
-        stream = client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-            stream=True,
-        )
-        
-        st.subheader(f':green[Summary ({summary_type})]')
-        st.write_stream(stream)
\ No newline at end of file
+            # Build prompt based on summary type
+            prompt = f"Summarize the following document {instruction}:\n\n{document_text}"
+            messages = [{"role": "user", "content": prompt}]
+
+            # Generate summary
+            stream = client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                stream=True,
+            )
+
+            st.subheader(f':green[Summary ({summary_type})]')
+            summary = st.write_stream(stream)
+
+        summary_cache.put(doc_hash, summary_type, model_name, summary_mode, summary)
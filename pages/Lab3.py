@@ -1,6 +1,13 @@
 import streamlit as st
 from openai import OpenAI
-import tiktoken  # pip install tiktoken
+from lab_utils.token_buffer import (
+    apply_token_buffer,
+    count_messages_tokens,
+    make_message,
+    to_api_messages,
+)
+from lab_utils.conversation_memory import RollingSummaryMemory
+from lab_utils.chat_history import get_archive, archive_overflow, render_chat_history
 
 # ============================================
 # APP SETUP
@@ -14,61 +21,21 @@ model_to_use = "gpt-4o-mini" if openAI_model == "mini" else "gpt-4o"
 # Buffer configuration
 MAX_CONTEXT_TOKENS = 100
 
+# Messages kept in session state; older ones move to the on-disk archive
+HISTORY_WINDOW = 20
+
+# Memory mode: drop old turns, or fold them into a running summary
+memory_mode = st.sidebar.selectbox("Memory mode:", ("Token buffer", "Rolling summary"))
+recent_tokens = st.sidebar.number_input(
+    "Recent turns kept verbatim (tokens):", min_value=50, max_value=4000, value=300, step=50,
+    disabled=memory_mode != "Rolling summary"
+)
+
 # Initialize OpenAI client
 if 'client' not in st.session_state:
     api_key = st.secrets["OPENAI_API_KEY"]
     st.session_state.client = OpenAI(api_key=api_key)
 
-# ============================================
-# TOKEN COUNTING FUNCTIONS
-# ============================================
-def count_tokens(text, model="gpt-4o"):
-    """Count tokens in a string."""
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(text))
-
-def count_messages_tokens(messages, model="gpt-4o"):
-    """Count total tokens across all messages."""
-    total = 0
-    for message in messages:
-        total += 4  # overhead per message
-        total += count_tokens(message["content"], model)
-    total += 2  # conversation overhead
-    return total
-
-def apply_token_buffer(messages, max_tokens, model="gpt-4o"):
-    """
-    Trim conversation history to stay under token limit.
-    Removes oldest messages first, preserves system message.
-    """
-    if len(messages) <= 1:
-        return messages
-    
-    # Preserve system message if present
-    system_msg = None
-    if messages[0]["role"] == "system":
-        system_msg = messages[0]
-        working_messages = messages[1:]
-    else:
-        working_messages = messages[:]
-    
-    current_tokens = count_messages_tokens(messages, model)
-    
-    # Remove oldest messages until under limit
-    while current_tokens > max_tokens and len(working_messages) > 1:
-        working_messages.pop(0)
-        current_tokens = count_messages_tokens(
-            ([system_msg] if system_msg else []) + working_messages,
-            model
-        )
-    
-    if system_msg:
-        return [system_msg] + working_messages
-    return working_messages
-
 # ============================================
 # CONVERSATION STATE TRACKING
 # ============================================
@@ -82,10 +49,18 @@ if "conversation_state" not in st.session_state:
 if "current_topic" not in st.session_state:
     st.session_state.current_topic = None
 
+# Rolling summary of turns that fell out of the recent window
+if "memory" not in st.session_state:
+    st.session_state.memory = RollingSummaryMemory()
+st.session_state.memory.recent_tokens = recent_tokens
+
+# Older turns moved out of session state
+archive = get_archive("lab3")
+
 # Message history for display and context
 if "messages" not in st.session_state:
     st.session_state.messages = [
-        {"role": "assistant", "content": "Hi! I'm here to help you learn. What would you like to know about?"}
+        make_message("assistant", "Hi! I'm here to help you learn. What would you like to know about?", model_to_use)
     ]
 
 # ============================================
@@ -114,21 +89,30 @@ def get_response(user_message, provide_more_info=False):
         prompt = user_message
         st.session_state.current_topic = user_message
     
-    # Build messages with system prompt
-    messages_to_send = [{"role": "system", "content": SYSTEM_PROMPT}]
-    
-    # Add conversation history
-    messages_to_send.extend(st.session_state.messages)
-    
-    # Add current user prompt
-    messages_to_send.append({"role": "user", "content": prompt})
-    
-    # NOW apply buffer once to the complete message list
-    messages_to_send = apply_token_buffer(
-        messages_to_send,
-        max_tokens=MAX_CONTEXT_TOKENS,
-        model=model_to_use
-    )
+    system_msg = make_message("system", SYSTEM_PROMPT, model_to_use)
+    prompt_msg = make_message("user", prompt, model_to_use)
+
+    if memory_mode == "Rolling summary":
+        # Summary of older turns + recent turns + current prompt
+        messages_to_send = st.session_state.memory.build_messages(
+            system_msg, st.session_state.messages, prompt_msg, model_to_use, offset=len(archive)
+        )
+    else:
+        # Build messages with system prompt
+        messages_to_send = [system_msg]
+
+        # Add conversation history
+        messages_to_send.extend(st.session_state.messages)
+
+        # Add current user prompt
+        messages_to_send.append(prompt_msg)
+
+        # NOW apply buffer once to the complete message list
+        messages_to_send = apply_token_buffer(
+            messages_to_send,
+            max_tokens=MAX_CONTEXT_TOKENS,
+            model=model_to_use
+        )
     
     # Debug info
     tokens_being_sent = count_messages_tokens(messages_to_send, model_to_use)
@@ -137,7 +121,7 @@ def get_response(user_message, provide_more_info=False):
     
     response = client.chat.completions.create(
         model=model_to_use,
-        messages=messages_to_send,
+        messages=to_api_messages(messages_to_send),
         stream=True
     )
     
@@ -159,9 +143,8 @@ def is_no(text):
 # ============================================
 # DISPLAY CONVERSATION HISTORY
 # ============================================
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.write(msg["content"])
+# Only the recent window is drawn; older pages load on request
+render_chat_history(st.session_state.messages, archive, lambda msg: st.write(msg["content"]))
 
 # ============================================
 # HANDLE USER INPUT
@@ -169,7 +152,7 @@ for msg in st.session_state.messages:
 if prompt := st.chat_input("Type here..."):
     
     # Display user's message
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.messages.append(make_message("user", prompt, model_to_use))
     with st.chat_message("user"):
         st.write(prompt)
     
@@ -186,7 +169,7 @@ if prompt := st.chat_input("Type here..."):
             st.write("Would you like to know more about this? (Yes/No)")
             answer += followup
         
-        st.session_state.messages.append({"role": "assistant", "content": answer})
+        st.session_state.messages.append(make_message("assistant", answer, model_to_use))
         st.session_state.conversation_state = "awaiting_more_info"
     
     # ----------------------------------------
@@ -204,14 +187,14 @@ if prompt := st.chat_input("Type here..."):
                 st.write("Would you like to know even more? (Yes/No)")
                 answer += followup
             
-            st.session_state.messages.append({"role": "assistant", "content": answer})
+            st.session_state.messages.append(make_message("assistant", answer, model_to_use))
             
         elif is_no(prompt):
             response = "Great! What else would you like to learn about?"
             with st.chat_message("assistant"):
                 st.write(response)
             
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            st.session_state.messages.append(make_message("assistant", response, model_to_use))
             st.session_state.conversation_state = "awaiting_question"
             st.session_state.current_topic = None
             
@@ -226,7 +209,20 @@ if prompt := st.chat_input("Type here..."):
                 st.write("Would you like to know more about this? (Yes/No)")
                 answer += followup
             
-            st.session_state.messages.append({"role": "assistant", "content": answer})
+            st.session_state.messages.append(make_message("assistant", answer, model_to_use))
+
+    # Between turns: fold anything outside the recent window into the summary
+    if memory_mode == "Rolling summary":
+        st.session_state.memory.compact(
+            st.session_state.client, st.session_state.messages, model_to_use, offset=len(archive)
+        )
+
+    # Move turns outside the window to the archive (never ones still waiting to be summarized)
+    keep = HISTORY_WINDOW
+    if memory_mode == "Rolling summary":
+        total = len(archive) + len(st.session_state.messages)
+        keep = max(keep, total - st.session_state.memory.summarized_count)
+    archive_overflow(st.session_state.messages, archive, keep)
 
 # ============================================
 # SIDEBAR: Debug info
@@ -235,5 +231,10 @@ st.sidebar.write("---")
 st.sidebar.write("**Debug Info:**")
 st.sidebar.write(f"State: {st.session_state.conversation_state}")
 st.sidebar.write(f"Topic: {st.session_state.current_topic}")
-st.sidebar.write(f"Total messages stored: {len(st.session_state.messages)}")
-    
\ No newline at end of file
+st.sidebar.write(f"Total messages stored: {len(st.session_state.messages)} (+{len(archive)} archived)")
+
+if memory_mode == "Rolling summary":
+    memory = st.session_state.memory
+    st.sidebar.write(f"Summary size: {memory.summary_tokens(model_to_use)} tokens")
+    st.sidebar.write(f"Compactions: {memory.compactions}")
+    st.sidebar.write(f"Tokens saved: {memory.tokens_saved}")
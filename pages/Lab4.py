@@ -1,65 +1,183 @@
 import streamlit as st
-import sys
+import time
+from pathlib import Path
+from lab_utils.resources import get_collection, get_openai_client, hnsw_settings, shared, timings
+from lab_utils.pipeline import run_pipeline
+from lab_utils.embedders import OpenAIEmbedder
+from lab_utils.manifest import sync_folder, content_version
+from lab_utils.embedding_cache import get_query_embedding_cache
+from lab_utils.answer_cache import get_answer_cache, history_key
+from lab_utils.context_packer import pack_context, trim_history
+from lab_utils.tokens import count_tokens
+from lab_utils.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from lab_utils.timing import RequestTimer
+from lab_utils.chat_history import get_archive, archive_overflow, render_chat_history
+import logging
 
-# sqlite3 fix - MUST be before chromadb import
-__import__('pysqlite3')
-sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+setup_started = time.perf_counter()
 
-import chromadb
-from openai import OpenAI
-from pathlib import Path
-import fitz
-import os
+# Chroma collection and OpenAI client are created once per process and
+# shared by every session (the pysqlite3 swap happens on first use too)
+collection = get_collection('./ChromaDB_for_Lab', 'Lab4Collection')
 
-# Create ChromeDB client
-chroma_client = chromadb.PersistentClient(path='./ChromaDB_for_Lab')
-collection = chroma_client.get_or_create_collection('Lab4Collection')
+# Retrieval tuning: candidates per query. HNSW ef_search is a property of the
+# shared, persisted collection, so it is set by the operator with
+# `python -m lab_utils.build_index --ef-search N`, not per session.
+st.sidebar.header('Retrieval settings')
+n_results = st.sidebar.slider('Candidates retrieved (k)', min_value=1, max_value=20, value=8)
+st.sidebar.caption(f"HNSW: {hnsw_settings(collection)}")
 
+if 'client' not in st.session_state:
+    st.session_state.client = get_openai_client(st.secrets["OPENAI_API_KEY"])
 
-# Read pdf and convert to txt
-def read_pdf(file_path):
-    """Extract text from a PDF file on disk."""
-    document = fitz.open(file_path)
-    text = ''
-    for page_num in range(len(document)):
-        page = document.load_page(page_num)
-        text += page.get_text()
-    document.close()
-    return text
+# Every embedding goes through the Embedder interface; swap the backend here
+embedder = shared('lab4_embedder', lambda: OpenAIEmbedder(st.session_state.client))
 
 
-# Initialize OpenAI client
-if 'client' not in st.session_state:
-    api_key = st.secrets["OPENAI_API_KEY"]
-    st.session_state.client = OpenAI(api_key=api_key)
+# bring the collection in line with the PDFs in the folder: only new or
+# edited files are embedded, and vectors for deleted files are removed.
+# Run `python -m lab_utils.build_index` beforehand so this is a no-op.
+def sync_pdfs_to_collection(folder_path, collection):
+    return sync_folder(
+        folder_path,
+        collection,
+        ingest=lambda paths: run_pipeline(embedder, collection, paths),
+    )
 
 
-# a function that will add documents to ChromaDB collection
-def add_to_collection(collection, text, file_name):
-    client = st.session_state.client
-    response = client.embeddings.create(
-        input=text,
-        model='text-embedding-3-small'
+# Synced once per process; restart the app (or run build_index) to pick up new files
+sync_report = shared('lab4_sync', lambda: sync_pdfs_to_collection('./Lab-04-Data/', collection))
+if sync_report['added_or_updated'] or sync_report['removed']:
+    st.sidebar.write(
+        f"Re-ingested {len(sync_report['added_or_updated'])} files as {sync_report.get('chunks', 0)} chunks "
+        f"({sync_report.get('chunks_per_second', 0)} chunks/s, "
+        f"{sync_report.get('embedding_requests', 0)} embedding requests), "
+        f"removed {len(sync_report['removed'])} files in {sync_report['sync_seconds']}s"
     )
-    embedding = response.data[0].embedding
-    collection.add(
-        documents=[text],
-        ids=[file_name],
-        embeddings=[embedding])
+for name, error in sync_report.get('failed', {}).items():
+    st.sidebar.warning(f"Skipped {name}: could not be parsed ({error})")
+
 
+# Query embeddings and answers shared across sessions
+query_cache = get_query_embedding_cache()
+answer_cache = get_answer_cache()
 
-# populate collection with PDFs
-def load_pdfs_to_collection(folder_path, collection):
-    pdf_files = [f for f in os.listdir(folder_path) if f.endswith('.pdf')]
-    for pdf_file in pdf_files:
-        file_path = os.path.join(folder_path, pdf_file)
-        text = read_pdf(file_path)
-        add_to_collection(collection, text, pdf_file)
+# Cached answers are only valid for the corpus they were generated from
+corpus_version = shared('lab4_corpus_version', content_version)
 
+setup_seconds = time.perf_counter() - setup_started
+answer_threshold = st.sidebar.slider(
+    'Answer cache similarity threshold', min_value=0.80, max_value=1.00, value=0.95, step=0.01
+)
 
-# check if collection is empty and load PDFs
-if collection.count() == 0:
-    load_pdfs_to_collection('./Lab-04-Data/', collection)
+
+# Per-request token and latency logs go to the server console. The handler is
+# attached once per process; the page script itself reruns on every interaction.
+logger = logging.getLogger('lab4')
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+CHAT_MODEL = 'gpt-5-mini'
+FUSION_CANDIDATES = 10
+
+# Token budgets per request
+CONTEXT_TOKENS = 3000
+HISTORY_TOKENS = 1500
+
+
+# Course-code questions are answered from the local BM25 index alone; everything
+# else merges BM25 and vector rankings with reciprocal rank fusion
+def retrieve(question, timer):
+    """Embed and retrieve stages. Returns (ids, documents, metadatas, query embedding or None, mode)."""
+    with timer.stage('retrieve'):
+        lexical = get_lexical_index(collection, corpus_version)
+        exact = lexical.exact_course_matches(question, n_results)
+    if exact:
+        positions = [i for i, _ in exact]
+        return (
+            [lexical.ids[i] for i in positions],
+            [lexical.documents[i] for i in positions],
+            [lexical.metadatas[i] for i in positions],
+            query_cache.peek(question, embedder.model),  # only if already cached; not counted as a lookup
+            'lexical',
+        )
+
+    with timer.stage('embed'):
+        query_embedding = query_cache.embed(embedder, question)
+
+    with timer.stage('retrieve'):
+        vector = collection.query(
+            query_embeddings=[query_embedding.tolist()],
+            n_results=max(n_results, FUSION_CANDIDATES)
+        )
+        rows = {
+            doc_id: (doc, meta or {})
+            for doc_id, doc, meta in zip(vector['ids'][0], vector['documents'][0], vector['metadatas'][0])
+        }
+        lexical_ids = [lexical.ids[i] for i, _ in lexical.search(question, max(n_results, FUSION_CANDIDATES))]
+        for doc_id in lexical_ids:
+            if doc_id not in rows:
+                i = lexical.positions[doc_id]
+                rows[doc_id] = (lexical.documents[i], lexical.metadatas[i])
+        fused = reciprocal_rank_fusion([vector['ids'][0], lexical_ids])[:n_results]
+
+    return (
+        fused,
+        [rows[doc_id][0] for doc_id in fused],
+        [rows[doc_id][1] for doc_id in fused],
+        query_embedding,
+        'hybrid',
+    )
+
+
+def pack(question, retrieved_ids, retrieved_docs, retrieved_metadatas, history, history_tokens):
+    """
+    Pack stage. Returns the messages to send, budgeted by tokens.
+    `history` is already trimmed to its budget (see trim_history).
+    """
+    candidates = []
+    for i in range(len(retrieved_docs)):
+        metadata = retrieved_metadatas[i] or {}
+        doc_id = metadata.get('source', retrieved_ids[i])
+        section = metadata.get('section')
+        heading = f"{doc_id} ({section})" if section else doc_id
+        candidates.append({'id': retrieved_ids[i], 'heading': heading, 'text': retrieved_docs[i]})
+    packed, context_tokens = pack_context(candidates, CONTEXT_TOKENS, CHAT_MODEL)
+
+    context = ""
+    for candidate in packed:
+        context += f"\n--- Document: {candidate['heading']} ---\n{candidate['text']}\n"
+
+    system_prompt = f"""You are a helpful iSchool course information assistant. 
+Answer questions about Syracuse University iSchool courses using the provided syllabus documents.
+
+When your answer is based on the retrieved course documents, clearly state which course(s) 
+you are referencing. If the documents don't contain relevant information to answer the question, 
+say so honestly.
+
+Here are the relevant course documents retrieved for this question:
+{context}
+"""
+
+    question_tokens = count_tokens(question, CHAT_MODEL)
+    logger.info(
+        "tokens: context=%d (%d/%d chunks) history=%d (%d messages) question=%d",
+        context_tokens, len(packed), len(candidates), history_tokens, len(history), question_tokens
+    )
+    st.sidebar.caption(
+        f"Tokens - context: {context_tokens} ({len(packed)}/{len(candidates)} chunks), "
+        f"history: {history_tokens} ({len(history)} messages), question: {question_tokens}"
+    )
+
+    return [
+        {'role': 'system', 'content': system_prompt},
+        *history,
+        {'role': 'user', 'content': question}
+    ]
 
 
 # Title
@@ -90,10 +208,11 @@ st.title("Lab 4: iSchool Course Chatbot Using RAG")
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 
-# Display chat history
-for message in st.session_state.messages:
-    with st.chat_message(message['role']):
-        st.markdown(message['content'])
+# Older turns moved out of session state
+archive = get_archive('lab4')
+
+# Display chat history (recent window only; older pages load on request)
+render_chat_history(st.session_state.messages, archive, lambda message: st.markdown(message['content']))
 
 # Chat input
 user_input = st.chat_input("Ask a question about iSchool courses...")
@@ -104,51 +223,64 @@ if user_input:
         st.markdown(user_input)
     st.session_state.messages.append({'role': 'user', 'content': user_input})
 
-    # Step 1: Embed the user's question and query ChromaDB
     client = st.session_state.client
-    response = client.embeddings.create(
-        input=user_input,
-        model='text-embedding-3-small'
-    )
-    query_embedding = response.data[0].embedding
+    timer = RequestTimer()
 
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=3
-    )
+    # Stages 1-2: embed the question (skipped for course codes) and retrieve
+    retrieved_ids, retrieved_docs, retrieved_metadatas, query_embedding, retrieval_mode = retrieve(user_input, timer)
+    st.sidebar.caption(f"Retrieval: {retrieval_mode}")
 
-    # Step 2: Build context from retrieved documents
-    context = ""
-    sources = []
-    for i in range(len(results['documents'][0])):
-        doc_text = results['documents'][0][i]
-        doc_id = results['ids'][0][i]
-        sources.append(doc_id)
-        context += f"\n--- Document: {doc_id} ---\n{doc_text}\n"
-
-    # Step 3: Send to LLM with RAG context
-    system_prompt = f"""You are a helpful iSchool course information assistant. 
-Answer questions about Syracuse University iSchool courses using the provided syllabus documents.
+    # Earlier turns get their own budget; the new question is always sent
+    with timer.stage('pack'):
+        history, history_tokens = trim_history(st.session_state.messages[:-1], HISTORY_TOKENS, CHAT_MODEL)
+    conversation_key = history_key(history)
 
-When your answer is based on the retrieved course documents, clearly state which course(s) 
-you are referencing. If the documents don't contain relevant information to answer the question, 
-say so honestly.
+    # Reuse the answer to a near-identical question that retrieved the same documents
+    # and was asked after the same conversation history
+    assistant_message = None
+    if query_embedding is not None:
+        with timer.stage('answer_cache'):
+            assistant_message = answer_cache.lookup(
+                query_embedding, retrieved_ids, corpus_version, answer_threshold, conversation_key
+            )
 
-Here are the relevant course documents retrieved for this question:
-{context}
-"""
+    with st.chat_message('assistant'):
+        if assistant_message is not None:
+            timer.mark_first_token()
+            st.markdown(assistant_message)
+        else:
+            # Stage 3: pack context into its token budget alongside the trimmed history
+            with timer.stage('pack'):
+                messages = pack(user_input, retrieved_ids, retrieved_docs, retrieved_metadatas,
+                                history, history_tokens)
 
-    llm_response = client.chat.completions.create(
-        model='gpt-5-mini',
-        messages=[
-            {'role': 'system', 'content': system_prompt},
-            *st.session_state.messages
-        ]
-    )
+            # Stage 4: stream the answer as it is generated
+            with timer.stage('generate'):
+                stream = client.chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    stream=True
+                )
+            assistant_message = st.write_stream(timer.stream_text(stream))
 
-    assistant_message = llm_response.choices[0].message.content
+            if query_embedding is not None:
+                answer_cache.store(user_input, query_embedding, retrieved_ids, assistant_message,
+                                   corpus_version, conversation_key)
 
-    # Display assistant response
-    with st.chat_message('assistant'):
-        st.markdown(assistant_message)
-    st.session_state.messages.append({'role': 'assistant', 'content': assistant_message})
\ No newline at end of file
+    st.session_state.messages.append({'role': 'assistant', 'content': assistant_message})
+    st.session_state.lab4_last_timings = timer.report()
+    logger.info("latency: %s", st.session_state.lab4_last_timings)
+
+    # Keep only the recent window in session state
+    archive_overflow(st.session_state.messages, archive)
+
+st.sidebar.caption(f"Query embedding cache: {query_cache.stats()}")
+st.sidebar.caption(f"Answer cache: {answer_cache.stats()}")
+st.sidebar.caption(
+    f"Store setup this rerun: {setup_seconds * 1000:.1f} ms | first-use (cold) timings: {timings}"
+)
+
+# Optional per-request latency panel
+if st.sidebar.checkbox('Show latency panel') and 'lab4_last_timings' in st.session_state:
+    st.sidebar.subheader('Last request latency')
+    st.sidebar.table({'ms': st.session_state.lab4_last_timings})
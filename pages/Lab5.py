@@ -1,39 +1,35 @@
-import requests
 import json
 import streamlit as st
 from openai import OpenAI
+from lab_utils.weather import get_weather_cache, fetch_many, prefetch, CALL_TIMEOUT
+import time
 
 st.title("🌤 Weather Bot ⛅")
 st.write("Enter a city to get, weather data, weather-appropriate clothing suggestions and outdoor activity ideas!")
 
 open_weather_api_key = st.secrets["OPEN_WEATHER_API_KEY"]
+
+# Shared across sessions: repeat lookups within the TTL skip OpenWeatherMap.
+# The sidebar value only applies to this session's lookups.
+weather_cache = get_weather_cache()
+max_age = st.sidebar.number_input(
+    "Max weather data age (seconds)", min_value=0, max_value=3600,
+    value=weather_cache.ttl_seconds, step=60
+)
+
 # location in form City, State, Country
 # e.g., Syracuse, NY, US
 # default units is degrees Fahrenheit
 def get_current_weather(location, api_key, units='imperial'):
-    url = (
-        f'https://api.openweathermap.org/data/2.5/weather'
-        f'?q={location}&appid={api_key}&units={units}'
-        )
-    response = requests.get(url)
-    if response.status_code == 401:
-     raise Exception('Authentication failed: Invalid API key (401 Unauthorized)')
-    if response.status_code == 404:
-        error_message = response.json().get('message')
-        raise Exception(f'404 error: {error_message}')
-    data = response.json()
-    temp = data['main']['temp']
-    feels_like = data['main']['feels_like']
-    temp_min = data['main']['temp_min']
-    temp_max = data['main']['temp_max']
-    humidity = data['main']['humidity']
-    return {'location': location,
-        'temperature': round(temp, 2),
-        'feels_like': round(feels_like, 2),
-        'temp_min': round(temp_min, 2),
-        'temp_max': round(temp_max, 2),
-        'humidity': round(humidity, 2)
-        }
+    return weather_cache.get(location, api_key, units, max_age=max_age)
+
+def show_weather(weather_data):
+    st.subheader(f"🌤️ Current Weather in {weather_data['location']}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Temperature", f"{weather_data['temperature']}°F")
+    col2.metric("Feels Like", f"{weather_data['feels_like']}°F")
+    col3.metric("Humidity", f"{weather_data['humidity']}%")
+    st.write(f"**High/Low:** {weather_data['temp_max']}°F / {weather_data['temp_min']}°F")
 
 # --- Tool definition for OpenAI ---
 tools = [
@@ -57,12 +53,64 @@ tools = [
 ]
 
 # --- UI ---
+mode = st.radio("Mode", ("Suggestions", "Compare cities"), horizontal=True)
+
+if mode == "Compare cities":
+    cities_input = st.text_area(
+        "Enter one city per line:", placeholder="Syracuse, NY, US\nLima, Peru\nTokyo, JP"
+    )
+    if st.button("Compare"):
+        cities = [line.strip() for line in cities_input.splitlines() if line.strip()]
+        if not cities:
+            st.warning("Enter at least one city.")
+            st.stop()
+
+        # Fan out every lookup in parallel; wall-clock time is about one lookup
+        started = time.perf_counter()
+        lookups = fetch_many(get_current_weather, cities, open_weather_api_key)
+        wall_seconds = time.perf_counter() - started
+
+        rows = {}
+        for city, weather_data, error, _ in lookups:
+            if error is not None:
+                rows[city] = {"Error": str(error)}
+            else:
+                rows[city] = {
+                    "Temperature (°F)": weather_data['temperature'],
+                    "Feels Like (°F)": weather_data['feels_like'],
+                    "High (°F)": weather_data['temp_max'],
+                    "Low (°F)": weather_data['temp_min'],
+                    "Humidity (%)": weather_data['humidity'],
+                }
+        st.subheader("🌍 Side-by-Side Comparison")
+        st.table(rows)
+
+        sequential_seconds = sum(seconds for _, _, _, seconds in lookups if seconds is not None)
+        st.caption(
+            f"{len(cities)} lookups in {wall_seconds:.2f}s wall-clock "
+            f"(sum of individual lookups: {sequential_seconds:.2f}s)"
+        )
+    st.sidebar.caption(f"Weather cache: {weather_cache.stats()}")
+    st.stop()
+
 location_input = st.text_input("Enter a city (e.g., Syracuse, NY, US):", placeholder="Syracuse, NY, US")
 
+SYSTEM_PROMPT = "You are a helpful assistant that provides clothing suggestions and outdoor activity recommendations based on current weather conditions."
+
+# Fast path: the user already typed the location, so look the weather up ourselves
+# and skip the model round-trip whose only job is to ask for it
+fast_path = st.sidebar.checkbox("Fetch weather directly (one model call)", value=True)
+if "lab5_latency" not in st.session_state:
+    st.session_state.lab5_latency = {"direct": [], "two-call": []}
+
 if st.button("Get Suggestions"):
+    started = time.perf_counter()
     if not location_input.strip():
         location_input = "Syracuse, NY"
 
+    # Start the lookup before anything else so it overlaps client setup
+    weather_future = prefetch(get_current_weather, location_input, open_weather_api_key) if fast_path else None
+
     openai_api_key = st.secrets["OPENAI_API_KEY"]
 
     client = OpenAI(api_key=openai_api_key)
@@ -71,63 +119,119 @@ if st.button("Get Suggestions"):
 
     with st.spinner("Thinking..."):
         try:
-            # Step 1: Send user message with tools
             messages = [
-                {"role": "system", "content": "You are a helpful assistant that provides clothing suggestions and outdoor activity recommendations based on current weather conditions."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": user_message}
             ]
 
-            response = client.chat.completions.create(
-                model="gpt-5",
-                messages=messages,
-                tools=tools,
-                tool_choice="auto"
-            )
-
-            assistant_message = response.choices[0].message
-
-            # Step 2: Check if the model wants to call the weather function
-            if assistant_message.tool_calls:
-                # Process each tool call
-                messages.append(assistant_message)
+            weather_data = None
+            if weather_future is not None:
+                try:
+                    weather_data = weather_future.result(timeout=CALL_TIMEOUT)
+                except Exception:
+                    # Ambiguous or unknown location: let the model work out what to look up
+                    weather_data = None
+
+            if weather_data is not None:
+                path = "direct"
+                show_weather(weather_data)
+
+                # Inject the lookup as if the model had asked for it, then generate once
+                messages.append({
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{
+                        "id": "call_direct_weather",
+                        "type": "function",
+                        "function": {
+                            "name": "get_current_weather",
+                            "arguments": json.dumps({"location": location_input}),
+                        },
+                    }],
+                })
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": "call_direct_weather",
+                    "content": json.dumps(weather_data)
+                })
+                final_response = client.chat.completions.create(
+                    model="gpt-5",
+                    messages=messages,
+                    tools=tools,
+                    tool_choice="none"
+                )
 
-                for tool_call in assistant_message.tool_calls:
-                    if tool_call.function.name == "get_current_weather":
-                        args = json.loads(tool_call.function.arguments)
-                        loc = args.get("location", "Syracuse, NY")
+                st.subheader("👕 Clothing & Activity Suggestions")
+                st.write(final_response.choices[0].message.content)
 
-                        # Call the actual weather API
-                        weather_data = get_current_weather(loc, open_weather_api_key)
+            else:
+                path = "two-call"
+                # Step 1: Send user message with tools
+                response = client.chat.completions.create(
+                    model="gpt-5",
+                    messages=messages,
+                    tools=tools,
+                    tool_choice="auto"
+                )
 
-                        # Display weather info
-                        st.subheader(f"🌤️ Current Weather in {weather_data['location']}")
-                        col1, col2, col3 = st.columns(3)
-                        col1.metric("Temperature", f"{weather_data['temperature']}°F")
-                        col2.metric("Feels Like", f"{weather_data['feels_like']}°F")
-                        col3.metric("Humidity", f"{weather_data['humidity']}%")
-                        st.write(f"**High/Low:** {weather_data['temp_max']}°F / {weather_data['temp_min']}°F")
+                assistant_message = response.choices[0].message
+
+                # Step 2: Check if the model wants to call the weather function
+                if assistant_message.tool_calls:
+                    # Process each tool call
+                    messages.append(assistant_message)
+
+                    # Run every weather lookup the model asked for at the same time
+                    weather_calls = [
+                        tool_call for tool_call in assistant_message.tool_calls
+                        if tool_call.function.name == "get_current_weather"
+                    ]
+                    locations = [
+                        json.loads(tool_call.function.arguments).get("location", "Syracuse, NY")
+                        for tool_call in weather_calls
+                    ]
+                    lookups = fetch_many(get_current_weather, locations, open_weather_api_key)
+
+                    for tool_call, (loc, weather_data, error, _) in zip(weather_calls, lookups):
+                        if error is not None:
+                            st.warning(f"Couldn't get weather for {loc}: {error}")
+                            tool_content = json.dumps({"location": loc, "error": str(error)})
+                        else:
+                            show_weather(weather_data)
+                            tool_content = json.dumps(weather_data)
 
                         # Append the tool result to messages
                         messages.append({
                             "role": "tool",
                             "tool_call_id": tool_call.id,
-                            "content": json.dumps(weather_data)
+                            "content": tool_content
                         })
 
-                # Step 3: Get final response with weather data included
-                final_response = client.chat.completions.create(
-                    model="gpt-5",
-                    messages=messages,
-                    tools=tools,
-                    tool_choice="auto"
-                )
+                    # Step 3: Get final response with weather data included
+                    final_response = client.chat.completions.create(
+                        model="gpt-5",
+                        messages=messages,
+                        tools=tools,
+                        tool_choice="auto"
+                    )
 
-                st.subheader("👕 Clothing & Activity Suggestions")
-                st.write(final_response.choices[0].message.content)
+                    st.subheader("👕 Clothing & Activity Suggestions")
+                    st.write(final_response.choices[0].message.content)
 
-            else:
-                # Model responded without calling a tool
-                st.write(assistant_message.content)
+                else:
+                    # Model responded without calling a tool
+                    st.write(assistant_message.content)
+
+            elapsed = time.perf_counter() - started
+            st.session_state.lab5_latency[path].append(elapsed)
+            st.caption(f"End-to-end: {elapsed:.2f}s ({path} path)")
 
         except Exception as e:
-            st.error(f"Error: {e}")
\ No newline at end of file
+            st.error(f"Error: {e}")
+
+for path, samples in st.session_state.lab5_latency.items():
+    if samples:
+        st.sidebar.caption(
+            f"{path}: {len(samples)} runs, mean {sum(samples) / len(samples):.2f}s, last {samples[-1]:.2f}s"
+        )
+st.sidebar.caption(f"Weather cache: {weather_cache.stats()}")
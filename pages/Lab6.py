@@ -1,15 +1,34 @@
+from functools import partial
 import streamlit as st
 from langchain.chat_models import init_chat_model
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
+from lab_utils.recommendations import (
+    GENRES, MOODS, PERSONAS, get_recommendation_store, start_warm_up, last_reports,
+)
+from lab_utils.followup_cache import get_followup_cache
+from lab_utils.resources import shared, timings
+from lab_utils.timing import RequestTimer
+from lab_utils.tokens import count_tokens
+
+# Time spent constructing the model and chains on this rerun
+setup_timer = RequestTimer()
 
 # Part A: Set Up the Application
 
-# Initialize the LLM using init_chat_model (Claude Haiku)
-llm = init_chat_model("claude-haiku-4-5-20251001", model_provider="anthropic")
+# Claude Haiku by default; pick "openai" in the sidebar for Part D
+MODELS = {
+    "anthropic": "claude-haiku-4-5-20251001",
+    "openai": "gpt-5.4-nano",
+}
+provider = st.sidebar.selectbox("Model provider", list(MODELS))
+MODEL = MODELS[provider]
 
-# To switch to OpenAI (Part D), comment out the line above and uncomment below:
-# llm = init_chat_model("gpt-5.4-nano", model_provider="openai")
+# Initialize the LLM using init_chat_model, once per process rather than on every rerun
+with setup_timer.stage("setup"):
+    llm = shared(f"lab6_llm:{provider}", lambda: init_chat_model(MODEL, model_provider=provider))
 
 st.title("🎬 Movie Recommendation Chatbot")
 
@@ -17,34 +36,48 @@ st.title("🎬 Movie Recommendation Chatbot")
 
 st.sidebar.header("Preferences")
 
-genre = st.sidebar.selectbox(
-    "Genre",
-    ["Action", "Comedy", "Horror", "Drama", "Sci-Fi", "Thriller", "Romance"]
-)
+genre = st.sidebar.selectbox("Genre", GENRES)
 
-mood = st.sidebar.selectbox(
-    "Mood",
-    ["Excited", "Happy", "Sad", "Bored", "Scared", "Romantic", "Curious", "Tense", "Melancholy"]
-)
+mood = st.sidebar.selectbox("Mood", MOODS)
+
+persona = st.sidebar.selectbox("Persona", PERSONAS)
 
-persona = st.sidebar.selectbox(
-    "Persona",
-    ["Film Critic", "Casual Friend", "Movie Journalist"]
-)
 
-# Create the recommendation PromptTemplate
-rec_prompt = PromptTemplate(
-    input_variables=["genre", "mood", "persona"],
-    template=(
-        "You are a {persona}. Recommend 3 movies in the {genre} genre "
-        "for someone who is feeling {mood}. For each movie, give the title, "
-        "year, and a short explanation of why it fits. Match the tone and style "
-        "of your chosen persona."
+def build_rec_chain():
+    # Create the recommendation PromptTemplate
+    rec_prompt = PromptTemplate(
+        input_variables=["genre", "mood", "persona"],
+        template=(
+            "You are a {persona}. Recommend 3 movies in the {genre} genre "
+            "for someone who is feeling {mood}. For each movie, give the title, "
+            "year, and a short explanation of why it fits. Match the tone and style "
+            "of your chosen persona."
+        )
     )
-)
 
-# Build the recommendation chain using the LCEL pipe operator
-rec_chain = rec_prompt | llm | StrOutputParser()
+    # Build the recommendation chain using the LCEL pipe operator
+    return rec_prompt | llm | StrOutputParser()
+
+
+with setup_timer.stage("setup"):
+    rec_chain = shared(f"lab6_rec_chain:{provider}", build_rec_chain)
+
+# Every preference combination is stored once generated and shared by all sessions;
+# the warm-up fills the whole 7 x 9 x 3 space in the background
+rec_store = get_recommendation_store()
+
+st.sidebar.divider()
+st.sidebar.subheader("Recommendation store")
+max_concurrency = st.sidebar.slider("Warm-up concurrency", 1, 16, 4)
+if st.sidebar.button("Warm up all combinations"):
+    if start_warm_up(rec_chain, rec_store, MODEL, max_concurrency=max_concurrency) is None:
+        st.sidebar.info("Nothing to do: every combination is fresh or already being generated.")
+    else:
+        st.sidebar.info("Warm-up started in the background.")
+st.sidebar.caption(f"{rec_store.count(MODEL)} / {len(GENRES) * len(MOODS) * len(PERSONAS)} combinations stored")
+if MODEL in last_reports:
+    st.sidebar.caption(f"Last warm-up: {last_reports[MODEL]}")
+st.sidebar.caption(f"Store: {rec_store.stats()}")
 
 # Initialize session state for the last recommendation
 if "last_recommendation" not in st.session_state:
@@ -52,45 +85,97 @@ if "last_recommendation" not in st.session_state:
 
 # Button to invoke the recommendation chain
 if st.button("Get Recommendations"):
-    with st.spinner("Generating recommendations..."):
-        result = rec_chain.invoke({
+    timer = RequestTimer()
+    stored = rec_store.get(genre, mood, persona, MODEL)
+    if stored is not None:
+        result, is_stale = stored
+        if is_stale:
+            # Serve the old answer now and regenerate it for next time
+            start_warm_up(rec_chain, rec_store, MODEL, keys=[(genre, mood, persona)])
+        timer.mark_first_token()
+        st.markdown(result)
+    else:
+        # Stream tokens onto the page as they arrive
+        result = st.write_stream(timer.stream_chunks(rec_chain.stream({
             "genre": genre,
             "mood": mood,
             "persona": persona
-        })
-        st.session_state.last_recommendation = result
-        st.markdown(result)
+        })))
+        rec_store.put(genre, mood, persona, MODEL, result)
+    st.session_state.last_recommendation = result
+    st.session_state.lab6_last_timings = timer.report()
 
 # Display the last recommendation if it exists (persists across reruns)
 elif st.session_state.last_recommendation:
     st.markdown(st.session_state.last_recommendation)
 
-# Part C: Build a Follow-Up Chain 
+# Part C: Build a Follow-Up Chain
 
 st.divider()
 follow_up = st.text_input("Ask a follow-up question about these movies:")
 
-# Create the follow-up PromptTemplate
-followup_prompt = PromptTemplate(
-    input_variables=["recommendations", "question"],
-    template=(
-        "Here are some movie recommendations that were previously given:\n\n"
-        "{recommendations}\n\n"
-        "The user has a follow-up question: {question}\n\n"
-        "Please answer the question based on the recommendations above."
-    )
+
+FOLLOWUP_SYSTEM = (
+    "Here are some movie recommendations that were previously given:\n\n"
+    "{recommendations}\n\n"
+    "Please answer the user's follow-up question based on the recommendations above."
 )
 
-# Build the follow-up chain
-followup_chain = followup_prompt | llm | StrOutputParser()
+
+# Shortest prompt prefix each provider will cache, in tokens
+PROMPT_CACHE_MIN_TOKENS = {"anthropic": 4096, "openai": 1024}
+
+
+def followup_messages(inputs, provider):
+    """
+    The recommendations form a system prefix that stays identical for every
+    question about them; only the final human message changes. Three short
+    recommendations are far below the providers' minimum cacheable length, so
+    provider prompt caching normally does not apply here; repeat questions are
+    saved by the follow-up answer cache instead. The Anthropic cache marker is
+    only added when a prefix is long enough to be cached.
+    """
+    text = FOLLOWUP_SYSTEM.format(recommendations=inputs["recommendations"])
+    prefix = {"type": "text", "text": text}
+    if provider == "anthropic" and count_tokens(text) >= PROMPT_CACHE_MIN_TOKENS["anthropic"]:
+        prefix["cache_control"] = {"type": "ephemeral"}
+    return [SystemMessage(content=[prefix]), HumanMessage(content=inputs["question"])]
+
+
+def build_followup_chain():
+    # Build the follow-up chain
+    return RunnableLambda(partial(followup_messages, provider=provider)) | llm | StrOutputParser()
+
+
+with setup_timer.stage("setup"):
+    followup_chain = shared(f"lab6_followup_chain:{provider}", build_followup_chain)
+
+# The text input keeps its value, so every unrelated rerun would ask the same
+# question again; answers are reused for the same recommendations and question
+followup_cache = get_followup_cache()
 
 # Invoke the follow-up chain when the user submits a question
 if follow_up and st.session_state.last_recommendation:
-    with st.spinner("Looking that up..."):
-        followup_result = followup_chain.invoke({
+    cached_answer = followup_cache.get(st.session_state.last_recommendation, follow_up, MODEL)
+    if cached_answer is not None:
+        st.markdown(cached_answer)
+    else:
+        timer = RequestTimer()
+        followup_result = st.write_stream(timer.stream_chunks(followup_chain.stream({
             "recommendations": st.session_state.last_recommendation,
             "question": follow_up
-        })
-        st.markdown(followup_result)
+        })))
+        followup_cache.put(st.session_state.last_recommendation, follow_up, MODEL, followup_result)
+        st.session_state.lab6_last_timings = timer.report()
 elif follow_up and not st.session_state.last_recommendation:
-    st.warning("Get recommendations first, then ask a follow-up question.")
\ No newline at end of file
+    st.warning("Get recommendations first, then ask a follow-up question.")
+
+st.sidebar.caption(f"Follow-up cache: {followup_cache.stats()}")
+st.sidebar.caption(
+    f"Model/chain setup this rerun: {setup_timer.stages['setup'] * 1000:.1f} ms | first-use (cold) timings: {timings}"
+)
+
+# Optional per-request latency panel
+if st.sidebar.checkbox('Show latency panel') and 'lab6_last_timings' in st.session_state:
+    st.sidebar.subheader('Last request latency')
+    st.sidebar.table({'ms': st.session_state.lab6_last_timings})
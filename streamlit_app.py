@@ -1,4 +1,10 @@
+import os
 import streamlit as st
+from lab_utils.resources import start_prewarm
+
+# Optionally load the Lab 4 vector index in the background when the first session opens the app
+if os.environ.get("LAB4_PREWARM"):
+    start_prewarm('./ChromaDB_for_Lab', 'Lab4Collection')
 
 # Define the pages
 lab1_page = st.Page("pages/Lab1.py", title="Lab 1", icon="📄")
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+from lab_utils import token_buffer, tokens
+from lab_utils.conversation_memory import RollingSummaryMemory
+
+
+class WordEncoding:
+    """Offline stand-in for a tiktoken encoding: one token per word."""
+    name = "words"
+
+    @staticmethod
+    def encode(text):
+        return text.split()
+
+
+class FakeClient:
+    def __init__(self):
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages):
+        self.prompts.append(messages[0]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="summary"))])
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(token_buffer, "get_encoding", lambda model: WordEncoding)
+    monkeypatch.setattr(tokens, "get_encoding", lambda model: WordEncoding)
+
+
+def messages(start, stop):
+    return [token_buffer.make_message("user", f"msg {i}") for i in range(start, stop)]
+
+
+def test_compact_after_switching_modes_counts_archived_turns():
+    # 30 turns were archived before Rolling summary was switched on
+    history = messages(30, 52)
+    memory = RollingSummaryMemory(recent_tokens=20)  # room for the last 3 messages
+    client = FakeClient()
+
+    memory.compact(client, history, background=False, offset=30)
+
+    assert memory.summarized_count == 49
+    assert "msg 48" in client.prompts[0] and "msg 49" not in client.prompts[0]
+
+    sent = memory.build_messages(
+        token_buffer.make_message("system", "system"), history,
+        token_buffer.make_message("user", "next"), offset=30,
+    )
+    assert [m["content"] for m in sent[2:-1]] == ["msg 49", "msg 50", "msg 51"]
+
+
+def test_compact_does_not_resummarize_turns():
+    history = messages(30, 52)
+    memory = RollingSummaryMemory(recent_tokens=20)
+    client = FakeClient()
+    memory.compact(client, history, background=False, offset=30)
+
+    history += messages(52, 54)
+    memory.compact(client, history, background=False, offset=30)
+
+    assert memory.summarized_count == 51
+    assert "msg 48" not in client.prompts[1]
+    assert "msg 49" in client.prompts[1] and "msg 50" in client.prompts[1]
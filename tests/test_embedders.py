@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from lab_utils import doc_index
+from lab_utils.build_index import DEFAULT_COLLECTION, DEFAULT_DB_PATH, artifact_paths
+from lab_utils.doc_index import DocumentIndex
+from lab_utils.embedders import Embedder, HashingEmbedder
+from lab_utils.lexical_index import DEFAULT_INDEX_PATH
+from lab_utils.manifest import DEFAULT_MANIFEST_PATH
+
+
+class FakeEmbedder(Embedder):
+    """One dimension per keyword, so similarity is easy to predict."""
+    model = 'fake'
+    KEYWORDS = ('python', 'grading', 'office')
+    dim = len(KEYWORDS)
+
+    def embed(self, texts):
+        self.requests += 1
+        return np.array(
+            [[float(word in text.lower()) for word in self.KEYWORDS] for text in texts], dtype=np.float32
+        )
+
+
+@pytest.fixture
+def word_chunks(monkeypatch):
+    # One chunk per line and one token per word, so no tokenizer download is needed
+    monkeypatch.setattr(doc_index, 'split_by_tokens', lambda text, *args: text.splitlines())
+    monkeypatch.setattr(doc_index, 'count_tokens', lambda text, model=None: len(text.split()))
+
+
+def test_embedder_requires_embed():
+    with pytest.raises(TypeError):
+        Embedder()
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    first = embedder.embed(['IST 343 syllabus', 'grading policy'])
+    second = embedder.embed(['IST 343 syllabus', 'grading policy'])
+
+    assert first.shape == (2, 64) and first.dtype == np.float32
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_allclose(np.linalg.norm(first, axis=1), 1.0, rtol=1e-5)
+    assert embedder.requests == 0
+
+
+def test_document_index_retrieves_with_fake_embedder(word_chunks):
+    embedder = FakeEmbedder()
+    index = DocumentIndex.build(embedder, 'We use Python weekly\nGrading is 40% exams\nOffice hours Monday')
+
+    excerpts, used = index.context_for(embedder, 'How is grading done?', k=1)
+
+    assert excerpts == ['Grading is 40% exams']
+    assert used == 4
+    assert embedder.requests == 2
+
+
+def test_document_without_text_has_empty_index(word_chunks):
+    index = DocumentIndex.build(FakeEmbedder(), '')
+
+    assert index.embeddings.shape[0] == 0
+    assert index.context_for(FakeEmbedder(), 'anything') == ([], 0)
+
+
+def test_artifact_paths_follow_the_store():
+    assert artifact_paths(DEFAULT_DB_PATH, DEFAULT_COLLECTION) == (DEFAULT_MANIFEST_PATH, DEFAULT_INDEX_PATH)
+    assert artifact_paths('/tmp/other_db', DEFAULT_COLLECTION) == (
+        '/tmp/other_db.Lab4Collection.manifest.json', '/tmp/other_db.Lab4Collection.bm25.json'
+    )
@@ -0,0 +1,12 @@
+import numpy as np
+
+from lab_utils.embedding_cache import QueryEmbeddingCache
+
+
+def test_peek_does_not_count_as_a_lookup(tmp_path):
+    cache = QueryEmbeddingCache(db_path=str(tmp_path / 'embeddings.sqlite3'))
+    assert cache.peek('What is IST 688?', 'fake') is None
+
+    cache.put('What is IST 688?', 'fake', np.ones(3))
+    assert cache.peek('what is ist 688', 'fake').tolist() == [1.0, 1.0, 1.0]
+    assert cache.stats() == {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'hit_rate': 0.0}
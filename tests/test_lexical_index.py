@@ -0,0 +1,23 @@
+from lab_utils.lexical_index import BM25Index, course_codes
+
+
+def test_course_codes_ignore_ordinary_numbers():
+    assert course_codes("what is 100 and is it in room 220?") == []
+    assert course_codes("Compare IST 488 with ist-343") == ['ist488', 'ist343']
+
+
+def test_exact_course_matches_only_returns_documents_with_the_code():
+    index = BM25Index(
+        ['488', '418', '343'],
+        [
+            'IST 488 Building Human-Centered AI Applications',
+            'IST 418 Big Data Analytics. Who teaches this course?',
+            'IST 343 Data in Society. Who teaches it and when?',
+        ],
+        [{}, {}, {}],
+    )
+
+    matches = index.exact_course_matches('who teaches IST 488')
+
+    assert [index.ids[i] for i, _ in matches] == ['488']
+    assert index.exact_course_matches('who teaches IST 999') == []
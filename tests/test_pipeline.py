@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+import pytest
+
+from lab_utils import pipeline
+from lab_utils.manifest import load_manifest, sync_folder
+
+
+class FakeEmbedder:
+    model = 'fake'
+
+    def embed(self, texts):
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+
+class FailingCollection:
+    def upsert(self, **kwargs):
+        raise RuntimeError('disk full')
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.ids = []
+
+    def upsert(self, ids, **kwargs):
+        self.ids.extend(ids)
+
+    def delete(self, ids):
+        self.ids = [i for i in self.ids if i not in ids]
+
+
+def fake_chunks(name, path, chunk_tokens, overlap_tokens):
+    return [
+        {'id': f'{name}::{i}', 'text': f'{name} {i}', 'metadata': {'source': name, 'section': '', 'chunk': i}}
+        for i in range(3)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def offline_stages(monkeypatch):
+    # Threads instead of processes so the patched parser is used, one batch per chunk
+    monkeypatch.setattr(
+        pipeline, 'ProcessPoolExecutor',
+        lambda max_workers, mp_context: pipeline.ThreadPoolExecutor(max_workers),
+    )
+    monkeypatch.setattr(pipeline, 'parse_and_chunk', fake_chunks)
+    monkeypatch.setattr(
+        pipeline, 'batch_by_limits',
+        lambda texts, model, with_tokens=False: [([text], 1) for text in texts],
+    )
+
+
+@pytest.mark.parametrize('files', [3, 20])
+def test_writer_failure_is_raised_and_does_not_hang(files):
+    paths = {f'doc{i}.pdf': f'doc{i}.pdf' for i in range(files)}
+    result = {}
+
+    def run():
+        try:
+            pipeline.run_pipeline(FakeEmbedder(), FailingCollection(), paths, embed_workers=1, write_batch=2)
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+
+    assert not thread.is_alive(), 'run_pipeline hung after the writer failed'
+    assert isinstance(result.get('error'), RuntimeError)
+
+
+def test_unparseable_file_is_skipped_and_left_out_of_manifest(tmp_path, monkeypatch):
+    def parse(name, path, chunk_tokens, overlap_tokens):
+        if name == 'corrupt.pdf':
+            raise ValueError('not a PDF')
+        return fake_chunks(name, path, chunk_tokens, overlap_tokens)
+
+    monkeypatch.setattr(pipeline, 'parse_and_chunk', parse)
+    folder = tmp_path / 'docs'
+    folder.mkdir()
+    for name in ('a.pdf', 'corrupt.pdf', 'b.pdf'):
+        (folder / name).write_bytes(name.encode())
+    collection = RecordingCollection()
+    manifest_path = str(tmp_path / 'manifest.json')
+
+    report = sync_folder(
+        str(folder), collection,
+        lambda paths: pipeline.run_pipeline(FakeEmbedder(), collection, paths, embed_workers=1),
+        manifest_path,
+    )
+
+    assert list(report['failed']) == ['corrupt.pdf']
+    assert report['added_or_updated'] == ['a.pdf', 'b.pdf']
+    assert sorted(collection.ids) == [f'{name}::{i}' for name in ('a.pdf', 'b.pdf') for i in range(3)]
+    assert sorted(load_manifest(manifest_path)) == ['a.pdf', 'b.pdf']
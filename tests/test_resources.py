@@ -0,0 +1,25 @@
+import threading
+
+from lab_utils.resources import shared
+
+
+def test_slow_factory_does_not_block_other_resources():
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'slow'
+
+    thread = threading.Thread(target=shared, args=('test_slow_resource', slow))
+    thread.start()
+    started.wait(5)
+
+    # Created while the slow factory still holds its own lock
+    assert shared('test_fast_resource', lambda: 'fast') == 'fast'
+    assert thread.is_alive()
+
+    release.set()
+    thread.join(5)
+    assert shared('test_slow_resource', lambda: 'other') == 'slow'
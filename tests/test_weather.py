@@ -0,0 +1,18 @@
+import time
+
+from lab_utils.weather import WeatherCache
+
+
+def fake_fetch(location, api_key, units):
+    return {'location': location, 'temperature': 70.0}
+
+
+def test_expired_and_least_recently_used_entries_are_evicted():
+    cache = WeatherCache(ttl_seconds=0.05, fetch=fake_fetch, max_entries=3)
+    for location in ('Syracuse', 'Boston', 'Austin', 'Denver'):
+        cache.get(location, 'key')
+    assert [key[0] for key in cache._entries] == ['boston', 'austin', 'denver']
+
+    time.sleep(0.06)
+    cache.get('Miami', 'key')
+    assert [key[0] for key in cache._entries] == ['miami']